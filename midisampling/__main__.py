@@ -6,7 +6,7 @@ from logging import getLogger
 
 from midisampling.logging_management import init_logging_from_config, OutputMode
 
-from midisampling.sampling import ISampling, DefaultSampling, DryRunSampling
+from midisampling.sampling import ISampling, DefaultSampling, DryRunSampling, MultitimbralSampling, ShardedSampling
 from midisampling.appconfig.midi import MidiConfig, load as load_midi_config
 from midisampling.appconfig.sampling import SamplingConfig, load as load_samplingconfig
 from midisampling.appconfig.audioprocess import AudioProcessConfig
@@ -24,6 +24,7 @@ def main():
     parser.add_argument("-l", "--log-file", help="Path to save the log file.")
     parser.add_argument("--overwrite-recorded", help="Overwrite recorded file if it exists.", action="store_true", default=False)
     parser.add_argument("--dry-run", help="Dry run the sampling process.", action="store_true", default=False)
+    parser.add_argument("--resume", help="Resume an interrupted sampling session. Items in the session journal whose recorded files are intact are skipped.", action="store_true", default=False)
 
     log_level_group = parser.add_mutually_exclusive_group()
     log_level_group.add_argument("-v", "--verbose", help="Enable verbose logging.", action="store_true")
@@ -98,14 +99,30 @@ def main():
                 sampling_config=sampling_config,
                 midi_config=midi_config,
                 postprocess_config=postprocess_config,
-                overwrite_recorded=args.overwrite_recorded
+                overwrite_recorded=args.overwrite_recorded,
+                resume=args.resume
             )
+        elif len(sampling_config.rigs) > 0:
+            sampling = ShardedSampling(
+                sampling_config=sampling_config,
+                midi_config=midi_config,
+                postprocess_config=postprocess_config,
+                overwrite_recorded=args.overwrite_recorded,
+                resume=args.resume)
+        elif len(midi_config.multitimbral_parts) > 0:
+            sampling = MultitimbralSampling(
+                sampling_config=sampling_config,
+                midi_config=midi_config,
+                postprocess_config=postprocess_config,
+                overwrite_recorded=args.overwrite_recorded,
+                resume=args.resume)
         else:
             sampling = DefaultSampling(
                 sampling_config=sampling_config,
                 midi_config=midi_config,
                 postprocess_config=postprocess_config,
-                overwrite_recorded=args.overwrite_recorded)
+                overwrite_recorded=args.overwrite_recorded,
+                resume=args.resume)
 
         sampling.initialize()
         sampling.execute()
@@ -43,9 +43,10 @@ class AudioProcessFormat:
         self.bit_depth: str = config.get("bit_depth", None)
         self.sample_rate: int = config.get("sample_rate", None)
         self.channels: int = config.get("channels", None)
+        self.dither: bool = config.get("dither", False)
 
     def __str__(self) -> str:
-        return f"bit_depth={self.bit_depth}, sample_rate={self.sample_rate}, channels={self.channels}"
+        return f"bit_depth={self.bit_depth}, sample_rate={self.sample_rate}, channels={self.channels}, dither={self.dither}"
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, AudioProcessFormat):
@@ -54,6 +55,7 @@ class AudioProcessFormat:
             self.bit_depth == other.bit_depth
             and self.sample_rate == other.sample_rate
             and self.channels == other.channels
+            and self.dither == other.dither
         )
 
 class AudioProcessInfo:
@@ -82,6 +84,7 @@ class AudioProcessConfig:
         config = validate(config_path)
         self.effects: List[AudioProcessInfo] = []
         self.keep_wav_chunks: List[str] = config.get("keep_wav_chunks", [])
+        self.jobs: int = config.get("jobs", 1)
         self.format: AudioProcessFormat = None
 
         if "format" in config:
@@ -107,7 +110,8 @@ class AudioProcessConfig:
         result = "["
         for effect in self.effects:
             result += f"[{effect}], "
-        result += f"keep_wav_chunks={self.keep_wav_chunks}"
+        result += f"keep_wav_chunks={self.keep_wav_chunks}, "
+        result += f"jobs={self.jobs}"
         result += "]"
 
         return result
@@ -166,6 +166,28 @@ class ProgramChange:
     def __hash__(self) -> int:
         return hash((self.msb, self.lsb, self.program))
 
+class MultitimbralPart:
+    """
+    A part of a multitimbral MIDI device sampled in parallel with the other parts.
+    """
+    def __init__(self, part: dict) -> None:
+        self.midi_channel: int         = part["midi_channel"]
+        self.audio_channels: List[int] = part["audio_channels"]
+
+    def __str__(self) -> str:
+        return f"midi_channel={self.midi_channel}, audio_channels={self.audio_channels}"
+
+class AdaptiveRelease:
+    """
+    Ends the release of a take once the tail decays below a threshold.
+    """
+    def __init__(self, adaptive_release: dict) -> None:
+        self.threshold_dBFS: float = adaptive_release["threshold_dBFS"]
+        self.hold_ms: float        = adaptive_release["hold_ms"]
+
+    def __str__(self) -> str:
+        return f"threshold_dBFS={self.threshold_dBFS}, hold_ms={self.hold_ms}"
+
 class VelocityLayer:
     def __init__(self, velocity_layer: dict) -> None:
         self.min_velocity: int  = velocity_layer["min"]
@@ -461,6 +483,19 @@ class MidiConfig:
         self.midi_pre_wait_duration: float              = config_json["midi_pre_wait_duration"]
         self.midi_note_duration: float                  = config_json["midi_note_duration"]
         self.midi_release_duration: float               = config_json["midi_release_duration"]
+        self.adaptive_release: AdaptiveRelease          = None
+
+        if "adaptive_release" in config_json:
+            self.adaptive_release = AdaptiveRelease(config_json["adaptive_release"])
+
+        # Multitimbral parts
+        self.multitimbral_parts: List[MultitimbralPart] = []
+        for part in config_json.get("multitimbral_parts", []):
+            self.multitimbral_parts.append(MultitimbralPart(part))
+
+        channels = [x.midi_channel for x in self.multitimbral_parts]
+        if len(channels) != len(set(channels)):
+            raise ValueError(f"multitimbral_parts: midi_channel must be unique. {channels}")
 
         # Program Change
         for pc in config_json["midi_program_change_list"]:
@@ -1,6 +1,7 @@
 from typing import List
 import os
 import json
+import copy
 
 from midisampling.jsonvalidation.validator import JsonSchemaInfo, JsonValidator
 
@@ -39,6 +40,19 @@ config_file_validator: JsonValidator = JsonValidator(
 with open(os.path.join(SCHEMA_FILES_DIR, "sampling-config.schema.json"), "r") as f:
     json_schema = json.load(f)
 
+class SamplingRig:
+    """
+    A (MIDI out, audio in) device pair
+    """
+    def __init__(self, rig: dict) -> None:
+        self.audio_in_device: str           = rig["audio_in_device"]["name"]
+        self.audio_in_device_platform: str  = rig["audio_in_device"]["platform"]
+        self.asio_audio_ins: List[int]      = rig.get("asio_audio_ins", [])
+        self.midi_out_device: str           = rig["midi_out_device"]
+
+    def __str__(self) -> str:
+        return f"midi_out_device={self.midi_out_device}, audio_in_device={self.audio_in_device} ({self.audio_in_device_platform}), asio_audio_ins={self.asio_audio_ins}"
+
 class SamplingConfig:
     def __init__(self, config_path: str) -> None:
         config = validate(config_path)
@@ -49,10 +63,24 @@ class SamplingConfig:
         self.audio_sample_rate: int         = config["audio_sample_rate"]
         self.audio_sample_bits: int         = config["audio_sample_bits"]
         self.audio_sample_bits_format:str   = config["audio_sample_bits_format"]
-        self.audio_in_device: str           = config["audio_in_device"]["name"]
-        self.audio_in_device_platform: str  = config["audio_in_device"]["platform"]
+        self.audio_in_device: str           = config.get("audio_in_device", {}).get("name", None)
+        self.audio_in_device_platform: str  = config.get("audio_in_device", {}).get("platform", None)
         self.asio_audio_ins: List[int]      = config.get("asio_audio_ins", [])
-        self.midi_out_device: str           = config["midi_out_device"]
+        self.midi_out_device: str           = config.get("midi_out_device", None)
+        self.audio_stream_to_disk_min_duration: float = config.get("audio_stream_to_disk_min_duration", None)
+        self.rigs: List[SamplingRig]        = [SamplingRig(x) for x in config.get("rigs", [])]
+
+    def for_rig(self, rig: SamplingRig) -> "SamplingConfig":
+        """
+        Get a copy of this config with the devices of the rig.
+        """
+        rig_config = copy.copy(self)
+        rig_config.audio_in_device          = rig.audio_in_device
+        rig_config.audio_in_device_platform = rig.audio_in_device_platform
+        rig_config.asio_audio_ins           = rig.asio_audio_ins
+        rig_config.midi_out_device          = rig.midi_out_device
+        rig_config.rigs                     = []
+        return rig_config
 
 def validate(config_path: str) -> dict:
     return _load_json_with_validate(config_path, config_file_validator)
@@ -90,6 +90,16 @@ class MidoMidiDevice(IMidiDevice):
         time.sleep(duration)
         self.midiout.send(note_off)
 
+    @override
+    def play_notes(self, notes: list[tuple[int, int, int]], duration: float) -> None:
+        for channel, note, velocity in notes:
+            self.midiout.send(mido.Message('note_on', channel=channel, note=note, velocity=velocity))
+
+        time.sleep(duration)
+
+        for channel, note, velocity in notes:
+            self.midiout.send(mido.Message('note_off', channel=channel, note=note, velocity=0))
+
     @override
     def send_progam_change(self, channel: int, msb: int, lsb: int, program: int) -> None:
         msb_message = mido.Message('control_change', channel=channel, control=0, value=msb)
@@ -1,5 +1,8 @@
-from typing import List, override
+from typing import List, Callable, override
 from logging import getLogger
+import os
+import queue
+import threading
 
 import numpy as np
 import sounddevice as sd
@@ -13,9 +16,168 @@ from .audiodevice import (
     AudioDeviceInfo,
     NotFoundAudioDeviceError
 )
+from .audioexport import AudioExportQueue
+from .audiobuffer import AudioBuffer, AudioBufferPool
+
+import midisampling.rf64 as rf64
+from midisampling.fileutil import temp_path_for
 
 logger = getLogger(__name__)
 
+STOP_RECORDING_TIMEOUT_MARGIN = 5.0
+"""
+Extra seconds to wait for the input stream before giving up on a take.
+"""
+
+EXPORT_QUEUE_SIZE = 4
+"""
+Maximum number of recorded takes waiting to be written to disk.
+"""
+
+BUFFER_POOL_SIZE = EXPORT_QUEUE_SIZE + 2
+"""
+Number of preallocated recording buffers. (Queued exports + the take being written + the take being recorded)
+"""
+
+CAPTURE_DTYPE_TABLE = {
+    AudioDataFormat.INT16: "int16",
+    AudioDataFormat.INT24: "int32", # No numpy type for packed 24 bit. libsndfile keeps the upper 24 bits when writing PCM_24.
+    AudioDataFormat.INT32: "int32",
+    AudioDataFormat.FLOAT32: "float32",
+}
+"""
+Capture sample type per AudioDataFormat. Buffers hold the target representation, so writing is a straight copy.
+"""
+
+class _RecordingTake:
+    """
+    A take cut out of the running input stream by sample index.
+    """
+    def __init__(self, frames: int) -> None:
+        self.start_frame: int = 0
+        self.end_frame: int   = frames
+        self.frames: int      = frames
+        self.completed        = threading.Event()
+        self.aborted: bool    = False
+        self.status           = sd.CallbackFlags()
+
+        # Silence detection (See `end_on_silence()`)
+        self.silence_threshold: float = None
+        self.silence_hold_frames: int = 0
+        self.silent_frames: int       = 0
+
+    def begin_at(self, start_frame: int) -> None:
+        """
+        Set the stream frame position where this take begins.
+        """
+        self.start_frame = start_frame
+        self.end_frame   = start_frame + self.frames
+
+    def end_on_silence(self, threshold: float, hold_frames: int) -> None:
+        """
+        End the take once the input peak stays below threshold (in sample units) for hold_frames.
+        """
+        self.silent_frames       = 0
+        self.silence_hold_frames = hold_frames
+        self.silence_threshold   = threshold
+
+    def feed(self, indata: np.ndarray, block_start_frame: int) -> None:
+        """
+        Pass the part of the input block overlapping this take to `write()`. (Called from the audio callback)
+        """
+        if self.completed.is_set():
+            return
+
+        block_end_frame = block_start_frame + len(indata)
+
+        begin = max(block_start_frame, self.start_frame)
+        end   = min(block_end_frame, self.end_frame)
+
+        if begin < end:
+            block = indata[begin - block_start_frame:end - block_start_frame]
+            self.write(begin - self.start_frame, block)
+
+            if self.silence_threshold is not None:
+                peak = max(int(block.max()), -int(block.min())) if block.dtype.kind == "i" else float(np.abs(block).max())
+                if peak < self.silence_threshold:
+                    self.silent_frames += len(block)
+                else:
+                    self.silent_frames = 0
+
+                if self.silent_frames >= self.silence_hold_frames:
+                    self.truncate(end - self.start_frame)
+
+        if block_end_frame >= self.end_frame:
+            self.close()
+            self.completed.set()
+
+    def truncate(self, frames: int) -> None:
+        """
+        End the take at `frames` frames from the take start.
+        """
+        self.frames    = frames
+        self.end_frame = self.start_frame + frames
+
+    def write(self, offset: int, block: np.ndarray) -> None:
+        """
+        Store the block at `offset` frames from the take start.
+        """
+        pass
+
+    def close(self) -> None:
+        """
+        Called once when the take is complete or aborted.
+        """
+        pass
+
+    def abort(self) -> None:
+        """
+        Stop the take before it is complete. (e.g. Timeout, disposing the device)
+        """
+        # Set before close(), so the writer sees it when it receives the end of the blocks
+        self.aborted = True
+        self.completed.set()
+        self.close()
+
+class _BufferedTake(_RecordingTake):
+    """
+    A take recorded into a (pooled) buffer in memory.
+    """
+    def __init__(self, frames: int, buffer: AudioBuffer) -> None:
+        super().__init__(frames)
+        self.buffer: AudioBuffer = buffer
+        self.data: np.ndarray    = buffer.view(frames)
+
+    @override
+    def write(self, offset: int, block: np.ndarray) -> None:
+        self.data[offset:offset + len(block)] = block
+
+    @override
+    def truncate(self, frames: int) -> None:
+        super().truncate(frames)
+        self.data = self.data[:frames]
+
+class _StreamingTake(_RecordingTake):
+    """
+    A take streamed to a file. Blocks are handed to the writer thread as they arrive.
+    """
+    def __init__(self, frames: int) -> None:
+        super().__init__(frames)
+        self.blocks: queue.SimpleQueue = queue.SimpleQueue()
+
+    @override
+    def write(self, offset: int, block: np.ndarray) -> None:
+        self.blocks.put(block.copy())
+
+    @override
+    def close(self) -> None:
+        self.blocks.put(None)
+
+def _makedirs_for(file_path: str) -> None:
+    directory = os.path.dirname(file_path)
+    if len(directory) > 0:
+        os.makedirs(directory, exist_ok=True)
+
 class SdAudioDevice(IAudioDevice):
     """
     Implementation of the IAudioDevice interface using the sounddevice library.
@@ -40,7 +202,18 @@ class SdAudioDevice(IAudioDevice):
                     AudioDeviceInfo(sd_device["index"], sd_device["name"], hostapi_info["name"])
                 )
 
-        self.recorded: np.ndarray = None
+        self.dtype: str                    = None
+        self.recorded: np.ndarray          = None
+        self.recorded_buffer: AudioBuffer  = None
+        self.buffer_pool: AudioBufferPool  = None
+
+        # Session-long input stream. Each take is cut out of it by sample index.
+        self.stream: sd.InputStream = None
+        self.stream_position: int   = 0
+        self.stream_lock            = threading.Lock()
+        self.take: _RecordingTake   = None
+
+        self.export_queue: AudioExportQueue = None
 
     @override
     def initialize(self) -> None:
@@ -64,57 +237,268 @@ class SdAudioDevice(IAudioDevice):
 
         logger.debug(f"Initialize audio device: {self.option.device_name}")
 
-        sd.default.device       = [audio_in_device_index, None] # input, output. (Use input only)
-        sd.default.samplerate   = self.option.sample_rate
-        sd.default.channels     = self.option.channels
+        self.dtype = CAPTURE_DTYPE_TABLE[self.option.data_format]
+        logger.debug(f"Capture dtype: {self.dtype}")
 
+        extra_settings = None
         if self.option.device_platform.lower() == "asio":
-            asio_in = sd.AsioSettings(channel_selectors=self.option.input_ports)
-            sd.default.extra_settings = asio_in
+            extra_settings = sd.AsioSettings(channel_selectors=self.option.input_ports)
             logger.debug(f"ASIO input ports: {self.option.input_ports}")
 
+        self.stream = sd.InputStream(
+            device=audio_in_device_index,
+            samplerate=self.option.sample_rate,
+            channels=self.option.channels,
+            dtype=self.dtype,
+            extra_settings=extra_settings,
+            callback=self._on_audio_input
+        )
+        self.stream.start()
+        logger.debug(f"Input stream started: latency={self.stream.latency}")
+
+        self.export_queue = AudioExportQueue(max_pending=EXPORT_QUEUE_SIZE)
+
+        if self.option.max_record_duration:
+            self.buffer_pool = AudioBufferPool(
+                count=BUFFER_POOL_SIZE,
+                frames=self._to_frames(self.option.max_record_duration),
+                channels=self.option.channels,
+                dtype=self.dtype
+            )
+
     @override
     def dispose(self) -> None:
+        # A streaming take in progress must be closed, or its writer job waits for blocks forever
+        with self.stream_lock:
+            take      = self.take
+            self.take = None
+        if take:
+            self._abort_take(take)
+
+        self._release_recorded()
         try:
-            self.stop_recording()
+            if self.stream:
+                self.stream.stop()
+                self.stream.close()
         finally:
-            pass
+            self.stream = None
+
+        try:
+            if self.export_queue:
+                self.export_queue.close()
+        finally:
+            self.export_queue = None
+
+    def _on_audio_input(self, indata: np.ndarray, frames: int, time, status: sd.CallbackFlags) -> None:
+        with self.stream_lock:
+            block_start_frame     = self.stream_position
+            self.stream_position += frames
+            take                  = self.take
+
+        if take:
+            take.status |= status
+            take.feed(indata, block_start_frame)
 
     @override
     def get_audio_devices(self) -> List[AudioDeviceInfo]:
         return self.audio_devices.copy()
 
+    def _to_frames(self, duration: float) -> int:
+        return round(duration * self.option.sample_rate)
+
+    def _acquire_buffer(self, frames: int) -> AudioBuffer:
+        if self.buffer_pool and frames <= self.buffer_pool.frames:
+            return self.buffer_pool.acquire()
+
+        # Longer than the preallocated buffers (or no pool): allocate for this take only
+        logger.debug(f"Allocate a buffer for this take: frames={frames}")
+        buffer = AudioBuffer(np.zeros((frames, self.option.channels), dtype=self.dtype))
+        buffer.retain()
+        return buffer
+
+    def _abort_take(self, take: _RecordingTake) -> None:
+        take.abort()
+        if isinstance(take, _BufferedTake):
+            take.buffer.release()
+
+    def _release_recorded(self) -> None:
+        if self.recorded_buffer:
+            self.recorded_buffer.release()
+        self.recorded_buffer = None
+        self.recorded        = None
+
+    @override
+    def start_recording(self, duration: float) -> None:
+        if not self.stream:
+            raise RuntimeError("Input stream is not started. Call initialize() first.")
+
+        # Previous take is no longer referenced from this device (Export jobs keep their own reference)
+        self._release_recorded()
+
+        frames = self._to_frames(duration)
+        take   = _BufferedTake(frames, self._acquire_buffer(frames))
+
+        self._begin_take(take)
+
     @override
-    def start_recording(self, duration: int) -> None:
-        self.recorded = sd.rec(duration * self.option.sample_rate)
+    def start_recording_to_file(self, duration: float, file_path: str, on_exported: Callable[[], None] = None) -> None:
+        if not self.stream:
+            raise RuntimeError("Input stream is not started. Call initialize() first.")
+
+        self._release_recorded()
+
+        option   = self.option
+        sub_type = self._get_sub_type()
+        take     = _StreamingTake(self._to_frames(duration))
+
+        def write() -> None:
+            _makedirs_for(file_path)
+
+            # Written to a temporary file and moved into place only if the take is complete
+            # (A truncated take must not be reported by `on_exported`, e.g. journaled as recorded)
+            temp_path = temp_path_for(file_path)
+
+            # RF64 if the take could exceed 4 GB
+            file_format = rf64.soundfile_format(take.frames, option.channels, sub_type)
+
+            try:
+                with sf.SoundFile(temp_path, mode="w", samplerate=option.sample_rate, channels=option.channels, subtype=sub_type, format=file_format) as f:
+                    while True:
+                        block = take.blocks.get()
+                        if block is None:
+                            break
+                        f.write(block)
+
+                if take.aborted:
+                    logger.warning(f"Take was aborted, discard the partial file: {file_path}")
+                    os.remove(temp_path)
+                    return
+
+                os.replace(temp_path, file_path)
+            except:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+
+            logger.debug(f"Exported: {file_path}")
+            if on_exported:
+                on_exported()
+
+        # Writer thread opens the file and waits for the blocks
+        self.export_queue.put(write)
+
+        self._begin_take(take)
+
+    def _begin_take(self, take: _RecordingTake) -> None:
+        # The take begins at the next frame delivered by the running stream
+        with self.stream_lock:
+            take.begin_at(self.stream_position)
+            self.take = take
 
     @override
     def stop_recording(self) -> None:
-        sd.wait()
+        take = self.take
+        if not take:
+            return
+
+        timeout = take.frames / self.option.sample_rate + STOP_RECORDING_TIMEOUT_MARGIN
+        if not take.completed.wait(timeout):
+            with self.stream_lock:
+                self.take = None
+            self._abort_take(take)
+            raise TimeoutError(f"Input stream did not deliver the take within {timeout:.1f} seconds.")
+
+        with self.stream_lock:
+            self.take = None
+
+        if take.status:
+            logger.warning(f"Input stream status while recording: {take.status}")
+
+        if isinstance(take, _BufferedTake):
+            self.recorded        = take.data
+            self.recorded_buffer = take.buffer
 
     @override
-    def export_audio(self, file_path: str) -> None:
-        option = self.option
+    def end_recording_on_silence(self, threshold_dBFS: float, hold_duration: float) -> None:
+        take = self.take
+        if not take:
+            return
+
+        full_scale = 1.0
+        if np.dtype(self.dtype).kind == "i":
+            full_scale = float(np.iinfo(self.dtype).max) + 1.0
+
+        take.end_on_silence(
+            threshold=full_scale * 10 ** (threshold_dBFS / 20),
+            hold_frames=self._to_frames(hold_duration)
+        )
 
+    def _get_sub_type(self) -> str:
         #------------------------------------------------------
         # Sub-type check for soundfile
         #------------------------------------------------------
-        sub_type = None
+        data_format = self.option.data_format
+        sub_type    = None
 
-        if option.data_format == AudioDataFormat.INT16:
+        if data_format == AudioDataFormat.INT16:
             sub_type = "PCM_16"
-        elif option.data_format == AudioDataFormat.INT24:
+        elif data_format == AudioDataFormat.INT24:
             sub_type = "PCM_24"
-        elif option.data_format == AudioDataFormat.INT32:
+        elif data_format == AudioDataFormat.INT32:
             sub_type = "PCM_32"
-        elif option.data_format == AudioDataFormat.FLOAT32:
+        elif data_format == AudioDataFormat.FLOAT32:
             sub_type = "FLOAT"
 
         logger.debug(f"sub_type: {sub_type}")
+        return sub_type
 
-        sf.write(
-            file=file_path,
-            data=self.recorded,
-            samplerate=option.sample_rate,
-            subtype=sub_type
-        )
+    @override
+    def export_audio(self, file_path: str, on_exported: Callable[[], None] = None, channels: List[int] = None) -> None:
+        option   = self.option
+        recorded = self.recorded
+        buffer   = self.recorded_buffer
+        sub_type = self._get_sub_type()
+
+        if buffer is None:
+            raise RuntimeError("No recorded audio to export.")
+
+        if channels is not None:
+            for x in channels:
+                if x < 0 or x >= option.channels:
+                    raise ValueError(f"Channel index out of range: {x} (channels={option.channels})")
+
+        def write() -> None:
+            try:
+                _makedirs_for(file_path)
+
+                # `recorded` is a zero-copy view of the pooled buffer
+                # (Selected channels are copied here on the writer thread)
+                data = recorded
+                if channels is not None:
+                    data = np.ascontiguousarray(recorded[:, channels])
+
+                sf.write(
+                    file=file_path,
+                    data=data,
+                    samplerate=option.sample_rate,
+                    subtype=sub_type,
+                    format=rf64.soundfile_format(data.shape[0], data.shape[1], sub_type)
+                )
+                logger.debug(f"Exported: {file_path}")
+            finally:
+                buffer.release()
+
+            if on_exported:
+                on_exported()
+
+        buffer.retain()
+        try:
+            self.export_queue.put(write)
+        except:
+            buffer.release()
+            raise
+
+    @override
+    def wait_for_export(self) -> None:
+        if self.export_queue:
+            self.export_queue.join()
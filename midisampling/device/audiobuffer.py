@@ -0,0 +1,73 @@
+from logging import getLogger
+import queue
+import threading
+
+import numpy as np
+
+logger = getLogger(__name__)
+
+class AudioBuffer:
+    """
+    Reference counted recording buffer.
+    A pooled buffer goes back to its AudioBufferPool when the last reference is released.
+    """
+    def __init__(self, data: np.ndarray, pool: 'AudioBufferPool' = None) -> None:
+        self.data: np.ndarray      = data
+        self.pool: AudioBufferPool = pool
+        self.refcount: int         = 0
+        self.lock                  = threading.Lock()
+
+    def view(self, frames: int) -> np.ndarray:
+        """
+        Get a zero-copy view of the first `frames` frames.
+        """
+        return self.data[:frames]
+
+    def retain(self) -> None:
+        with self.lock:
+            self.refcount += 1
+
+    def release(self) -> None:
+        with self.lock:
+            self.refcount -= 1
+            released = self.refcount == 0
+
+        if released and self.pool:
+            self.pool.give_back(self)
+
+class AudioBufferPool:
+    """
+    Ring of preallocated recording buffers reused across takes.
+    `acquire()` blocks while all buffers are in use.
+    """
+    def __init__(self, count: int, frames: int, channels: int, dtype: str) -> None:
+        """
+        Parameters
+        ----------
+            count:
+                Number of buffers in the ring.
+            frames:
+                Capacity of each buffer in frames.
+            channels:
+                Number of channels.
+            dtype:
+                Sample data type of the buffers.
+        """
+        self.frames: int       = frames
+        self.free: queue.Queue = queue.Queue()
+
+        for _ in range(count):
+            self.free.put(AudioBuffer(np.zeros((frames, channels), dtype=dtype), pool=self))
+
+        logger.debug(f"Allocated audio buffers: count={count}, frames={frames}, channels={channels}, dtype={dtype}")
+
+    def acquire(self) -> AudioBuffer:
+        """
+        Get a free buffer. The caller owns one reference to the returned buffer.
+        """
+        buffer = self.free.get()
+        buffer.retain()
+        return buffer
+
+    def give_back(self, buffer: AudioBuffer) -> None:
+        self.free.put(buffer)
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Callable
 from enum import Enum
 import abc
 
@@ -56,17 +56,18 @@ class AudioDeviceOption:
     """
     Audio device options for initialization.
     """
-    def __init__(self, device_name: str, device_platform: str, sample_rate: int, channels: int, data_format: AudioDataFormat, input_ports: List[int]) -> None:
+    def __init__(self, device_name: str, device_platform: str, sample_rate: int, channels: int, data_format: AudioDataFormat, input_ports: List[int], max_record_duration: float = None) -> None:
         self.device_name: str               = device_name
         self.device_platform: str           = device_platform
         self.sample_rate: int               = sample_rate
         self.channels: int                  = channels
         self.data_format: AudioDataFormat   = data_format
         self.input_ports: List[int]         = input_ports
+        self.max_record_duration: float     = max_record_duration # Longest take in seconds. Used to preallocate recording buffers.
 
 
     def __str__(self) -> str:
-        return f"device_name={self.device_name}, device_platform={self.device_platform}, sample_rate={self.sample_rate}, channels={self.channels}, data_format={self.data_format}, input_ports={self.input_ports}"
+        return f"device_name={self.device_name}, device_platform={self.device_platform}, sample_rate={self.sample_rate}, channels={self.channels}, data_format={self.data_format}, input_ports={self.input_ports}, max_record_duration={self.max_record_duration}"
 
 class IAudioDevice(metaclass=abc.ABCMeta):
     @abc.abstractmethod
@@ -92,9 +93,49 @@ class IAudioDevice(metaclass=abc.ABCMeta):
         return []
 
     @abc.abstractmethod
-    def start_recording(self, duration: int) -> None:
+    def start_recording(self, duration: float) -> None:
         """
         Start recording audio. This function should be non-blocking.
+        The take begins at the next frame captured by the device.
+
+        Parameters
+        ----------
+            duration:
+                Record duration in seconds. Fractional values are recorded exactly. (rounded to the nearest frame)
+        """
+        pass
+
+    @abc.abstractmethod
+    def start_recording_to_file(self, duration: float, file_path: str, on_exported: Callable[[], None] = None) -> None:
+        """
+        Start recording audio straight to a file. This function should be non-blocking.
+        Captured blocks are written while recording, so only a few blocks are kept in memory.
+        `export_audio()` is not needed for this take. Call `wait_for_export()` before reading the file.
+
+        Parameters
+        ----------
+            duration:
+                Record duration in seconds.
+            file_path:
+                Output file path. Parent directories are created if needed.
+            on_exported:
+                Called after the file is completely written. (May be called from another thread)
+        """
+        pass
+
+    @abc.abstractmethod
+    def end_recording_on_silence(self, threshold_dBFS: float, hold_duration: float) -> None:
+        """
+        Arm silence detection for the current take.
+        The take ends early once the input level stays below threshold_dBFS for hold_duration seconds.
+        The duration given to `start_recording()` remains the upper bound.
+
+        Parameters
+        ----------
+            threshold_dBFS:
+                Silence threshold in dBFS.
+            hold_duration:
+                Seconds the input must stay below the threshold.
         """
         pass
 
@@ -102,12 +143,33 @@ class IAudioDevice(metaclass=abc.ABCMeta):
     def stop_recording(self) -> None:
         """
         Stop recording audio.
+        Block until the whole take requested by `start_recording()` is captured
+        (or until it ends early by `end_recording_on_silence()`).
         """
         pass
 
     @abc.abstractmethod
-    def export_audio(self, file_path: str) -> None:
+    def export_audio(self, file_path: str, on_exported: Callable[[], None] = None, channels: List[int] = None) -> None:
         """
         Export recorded audio to a file.
+        The file may be written in the background. Call `wait_for_export()` before reading it.
+        Parent directories of file_path are created if needed.
+
+        Parameters
+        ----------
+            file_path:
+                Output file path.
+            on_exported:
+                Called after the file is completely written. (May be called from another thread)
+            channels:
+                Indices of the recorded channels to export. (e.g. `[2, 3]`) If not specified, export all channels.
+                Can be called multiple times for the same take to split it into multiple files.
+        """
+        pass
+
+    @abc.abstractmethod
+    def wait_for_export(self) -> None:
+        """
+        Block until all pending exports are written.
         """
         pass
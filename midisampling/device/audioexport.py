@@ -0,0 +1,86 @@
+from typing import Callable
+from logging import getLogger
+import queue
+import threading
+
+logger = getLogger(__name__)
+
+class AudioExportQueue:
+    """
+    Bounded queue of export jobs processed by a background writer thread.
+
+    `put()` blocks while the queue is full, so the sampling loop is slowed down to the disk speed
+    instead of piling up recorded buffers in memory.
+
+    Examples
+    --------
+
+    ```python
+    export_queue = AudioExportQueue(max_pending=4)
+    export_queue.put(lambda: sf.write("take.wav", data, 48000))
+
+    # Wait for all pending jobs
+    export_queue.join()
+
+    # Drain and stop the writer thread
+    export_queue.close()
+    ```
+    """
+
+    def __init__(self, max_pending: int = 4) -> None:
+        """
+        Parameters
+        ----------
+            max_pending:
+                Maximum number of jobs waiting for the writer thread.
+        """
+        self.jobs: queue.Queue        = queue.Queue(maxsize=max_pending)
+        self.error: Exception         = None
+        self.thread: threading.Thread = threading.Thread(target=self._run, name="AudioExportQueue", daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        while True:
+            job = self.jobs.get()
+            try:
+                if job is None:
+                    return
+                job()
+            except Exception as e:
+                logger.error(f"Export failed: {e}")
+                if self.error is None:
+                    self.error = e
+            finally:
+                self.jobs.task_done()
+
+    def put(self, job: Callable[[], None]) -> None:
+        """
+        Hand off a job to the writer thread. Blocks while the queue is full.
+        Raises the error of a previously failed job, if any.
+        """
+        self.raise_if_failed()
+        if not self.thread.is_alive():
+            raise RuntimeError("Export queue is already closed.")
+        self.jobs.put(job)
+
+    def join(self) -> None:
+        """
+        Block until all pending jobs are done.
+        Raises the error of a failed job, if any.
+        """
+        self.jobs.join()
+        self.raise_if_failed()
+
+    def close(self) -> None:
+        """
+        Drain pending jobs and stop the writer thread.
+        """
+        if self.thread.is_alive():
+            self.jobs.put(None)
+            self.thread.join()
+        self.raise_if_failed()
+
+    def raise_if_failed(self) -> None:
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
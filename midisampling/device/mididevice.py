@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Tuple
 import abc
 
 class NotFoundMidiDeviceError(Exception):
@@ -63,6 +63,21 @@ class IMidiDevice(metaclass=abc.ABCMeta):
         """
         pass
 
+    @abc.abstractmethod
+    def play_notes(self, notes: List[Tuple[int, int, int]], duration: float) -> None:
+        """
+        Send to MIDI note on/off of multiple notes to the device at once.
+        All notes are on for the same duration.
+
+        Parameters
+        ----------
+            notes:
+                List of (MIDI channel (0-15), MIDI note (0-127), MIDI velocity (0-127))
+            duration:
+                Duration in seconds
+        """
+        pass
+
     @abc.abstractmethod
     def send_progam_change(self, channel: int, msb: int, lsb: int, program: int) -> None:
         """
@@ -1,18 +1,27 @@
 import abc
-from typing import List, override
+from typing import Dict, List, override
 
 import os
 import pathlib
-import shutil
+
+from midisampling.fileutil import clone_file
 
 class RecordedAudioPath:
     """
     Exporting audio path information
     """
 
-    def __init__(self, base_dir:str, file_path:str):
-        self.base_dir: str  = base_dir
-        self.file_path: str = os.path.normpath(file_path)
+    def __init__(self, base_dir:str, file_path:str, placeholders: Dict[str, object] = None):
+        """
+        Parameters
+        ----------
+            placeholders:
+                Values of the path placeholders (e.g. `pc`, `velocity`) which `file_path` is expanded from.
+                None if not known. (e.g. Files found in a directory)
+        """
+        self.base_dir: str                   = base_dir
+        self.file_path: str                  = os.path.normpath(file_path)
+        self.placeholders: Dict[str, object] = placeholders
 
     def path(self) -> str:
         """
@@ -35,7 +44,7 @@ class RecordedAudioPath:
         """
         dest = os.path.join(dest_dir, self.file_path) # join sub directory included in file_path
         os.makedirs(os.path.dirname(dest), exist_ok=True)
-        shutil.copyfile(self.path(), dest)
+        clone_file(self.path(), dest)
 
     @classmethod
     def from_directory(cls, input_directory: str, search_extension: str = ".wav") -> List['RecordedAudioPath']:
@@ -133,7 +142,7 @@ class ProcessedAudioPath:
         """
         dest = os.path.join(dest_dir, self.file_path) # join sub directory included in file_path
         os.makedirs(os.path.dirname(dest), exist_ok=True)
-        shutil.copyfile(self.working_path(), dest)
+        clone_file(self.working_path(), dest)
 
     def __str__(self):
         return f"output_dir={self.output_dir}, file_path={self.file_path}, working_dir={self.working_dir}, recorded_audio_path={self.recorded_audio_path}"
@@ -0,0 +1,52 @@
+import os
+import sys
+import shutil
+import uuid
+
+from logging import getLogger
+
+logger = getLogger(__name__)
+
+FICLONE = 0x40049409
+"""
+ioctl request of Linux to share the data blocks of a file. (Btrfs, XFS, etc.)
+"""
+
+def temp_path_for(file_path: str) -> str:
+    """
+    Get a unique temporary file path in the same directory as `file_path`.
+    The file written to the path can be moved to `file_path` atomically with `os.replace()`.
+    (Hidden and without the original extension, so it is not listed as an audio file)
+    """
+    file_dir  = os.path.dirname(os.path.abspath(file_path))
+    file_name = os.path.basename(file_path)
+    return os.path.join(file_dir, f".{file_name}.{uuid.uuid4().hex}.tmp")
+
+def _reflink(src: str, dst: str) -> bool:
+    """
+    Clone `src` to `dst` sharing the data blocks. Returns False if not supported by the platform or filesystem.
+    """
+    if not sys.platform.startswith("linux"):
+        return False
+
+    import fcntl
+
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            return True
+        except OSError:
+            return False
+
+def clone_file(src: str, dst: str) -> None:
+    """
+    Copy `src` to `dst` with a reflink (copy-on-write) if the filesystem supports it, otherwise copy the contents.
+
+    Hardlinks are not used: `dst` would share the inode with `src`,
+    so any later in-place edit of either file would change the other. (e.g. Recorded files)
+    """
+    if _reflink(src, dst):
+        logger.debug(f"Cloned: {src} -> {dst}")
+        return
+
+    shutil.copyfile(src, dst)
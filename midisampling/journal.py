@@ -0,0 +1,117 @@
+from typing import Dict
+import os
+import json
+import threading
+from logging import getLogger
+
+from midisampling.appconfig.midi import SampleZone, VelocityLayer, ProgramChange
+from midisampling.exportpath import RecordedAudioPath
+
+logger = getLogger(__name__)
+
+JOURNAL_FILE_NAME = ".midisampling-journal.jsonl"
+"""
+File name of the journal in the output directory.
+"""
+
+class SamplingJournal:
+    """
+    Append-only journal of completed sampling items (program, zone, velocity) in JSON Lines format.
+    Used to resume an interrupted sampling session.
+
+    Examples
+    --------
+
+    ```python
+    journal = SamplingJournal(os.path.join(output_dir, JOURNAL_FILE_NAME))
+    journal.load()
+
+    if journal.is_completed(program, zone, velocity, recorded_path):
+        # Skip this item
+        ...
+    else:
+        # Record, then
+        journal.append(program, zone, velocity, recorded_path)
+    ```
+    """
+
+    def __init__(self, journal_path: str) -> None:
+        self.journal_path: str        = journal_path
+        self.entries: Dict[str, dict] = {}
+        self.lock                     = threading.Lock()
+
+    @classmethod
+    def item_key(cls, program: ProgramChange, zone: SampleZone, velocity: VelocityLayer) -> str:
+        return (
+            f"{program.msb}:{program.lsb}:{program.program}"
+            f"/{zone.key_root}:{zone.key_low}:{zone.key_high}"
+            f"/{velocity.min_velocity}:{velocity.max_velocity}:{velocity.send_velocity}"
+        )
+
+    def load(self) -> None:
+        """
+        Load entries from the journal file. Does nothing if the file does not exist.
+        """
+        self.entries = {}
+
+        if not os.path.exists(self.journal_path):
+            return
+
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, start=1):
+                line = line.strip()
+                if len(line) == 0:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # e.g. Interrupted while writing the last line
+                    logger.warning(f"Ignore broken journal entry: {self.journal_path}:{line_no}")
+                    continue
+                self.entries[entry["key"]] = entry
+
+        logger.info(f"Loaded journal: {len(self.entries)} completed item(s) in {self.journal_path}")
+
+    def clear(self) -> None:
+        """
+        Start a new journal. (Remove all entries)
+        """
+        self.entries = {}
+        os.makedirs(os.path.dirname(self.journal_path), exist_ok=True)
+        with open(self.journal_path, "w", encoding="utf-8"):
+            pass
+
+    def append(self, program: ProgramChange, zone: SampleZone, velocity: VelocityLayer, recorded_path: RecordedAudioPath) -> None:
+        """
+        Append a completed item. The recorded file must already be written.
+        This method is thread safe.
+        """
+        key   = SamplingJournal.item_key(program, zone, velocity)
+        entry = {
+            "key": key,
+            "program": {"msb": program.msb, "lsb": program.lsb, "program": program.program},
+            "zone": {"key_root": zone.key_root, "key_low": zone.key_low, "key_high": zone.key_high},
+            "velocity": {"min": velocity.min_velocity, "max": velocity.max_velocity, "send": velocity.send_velocity},
+            "file_path": recorded_path.file_path,
+            "size": os.path.getsize(recorded_path.path()),
+        }
+
+        with self.lock:
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.entries[key] = entry
+
+    def is_completed(self, program: ProgramChange, zone: SampleZone, velocity: VelocityLayer, recorded_path: RecordedAudioPath) -> bool:
+        """
+        Whether the item is journaled and its recorded file is intact (same path and size).
+        """
+        entry = self.entries.get(SamplingJournal.item_key(program, zone, velocity))
+        if not entry:
+            return False
+        if entry["file_path"] != recorded_path.file_path:
+            return False
+
+        path = recorded_path.path()
+        return os.path.exists(path) and os.path.getsize(path) == entry["size"]
@@ -0,0 +1,77 @@
+"""
+RF64 / BW64 (RIFF with 64-bit sizes in the `ds64` chunk) support for wav files larger than 4 GB.
+"""
+
+from typing import Dict, Iterator, Union
+import io
+import contextlib
+
+RIFF_MAX_SIZE = 0xFFFFFFFF
+"""
+Maximum size in the 32-bit size fields of RIFF. (`0xFFFFFFFF` means "see ds64" in RF64 / BW64)
+"""
+
+RF64_HEADROOM = 64 * 1024 * 1024
+"""
+Room for the header and metadata chunks (e.g. restored by WavChunkKeeper) when choosing RF64 by the size of samples.
+"""
+
+RIFF_FORM_IDS = (b"RIFF", b"RF64", b"BW64")
+"""
+Supported IDs at the beginning of the wav file.
+"""
+
+SAMPLE_BYTES_TABLE: Dict[str, int] = {
+    "PCM_S8": 1,
+    "PCM_U8": 1,
+    "PCM_16": 2,
+    "PCM_24": 3,
+    "PCM_32": 4,
+    "FLOAT": 4,
+    "DOUBLE": 8,
+}
+"""
+Table of soundfile subtype to bytes per sample.
+"""
+
+def soundfile_format(frames: int, channels: int, subtype: str) -> str:
+    """
+    Get the soundfile format to write the samples. `RF64` if the file could exceed 4 GB, otherwise `WAV`.
+    """
+    data_size = frames * channels * SAMPLE_BYTES_TABLE.get(subtype, 8)
+    if data_size + RF64_HEADROOM > RIFF_MAX_SIZE:
+        return "RF64"
+    return "WAV"
+
+def read_form_id(file_path: str) -> bytes:
+    with open(file_path, "rb") as f:
+        return f.read(4)
+
+class BW64Reader(io.FileIO):
+    """
+    Read a BW64 file as RF64. (Same layout, but BW64 is not recognised by libsndfile)
+    """
+    def __init__(self, file_path: str) -> None:
+        super().__init__(file_path, "rb")
+
+    def readinto(self, buffer) -> int:
+        position = self.tell()
+        count    = super().readinto(buffer)
+
+        if count and position < 4:
+            patch_size = min(4 - position, count)
+            memoryview(buffer)[0:patch_size] = b"RF64"[position:position + patch_size]
+
+        return count
+
+@contextlib.contextmanager
+def soundfile_source(file_path: str) -> Iterator[Union[str, io.FileIO]]:
+    """
+    Get the source to open the wav file by soundfile. (BW64 is opened with BW64Reader)
+    """
+    if read_form_id(file_path) != b"BW64":
+        yield file_path
+        return
+
+    with BW64Reader(file_path) as f:
+        yield f
@@ -1,8 +1,10 @@
-from typing import List, override
+from typing import List, Tuple, Callable, override
 import abc
-import math
 import os
 import time
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from logging import getLogger
 
 from midisampling.device.mididevice import IMidiDevice
@@ -13,7 +15,7 @@ from midisampling.device.SdAudioDevice import SdAudioDevice
 
 
 from midisampling.appconfig.sampling import SamplingConfig
-from midisampling.appconfig.midi import MidiConfig, SampleZone, VelocityLayer, ProgramChange
+from midisampling.appconfig.midi import MidiConfig, SampleZone, VelocityLayer, ProgramChange, MultitimbralPart
 
 import midisampling.dynamic_format as dynamic_format
 
@@ -22,6 +24,7 @@ from midisampling.appconfig.audioprocess import AudioProcessConfig
 from midisampling.waveprocess.processing import process as run_postprocess
 
 import midisampling.notenumber as notenumber_util
+from midisampling.journal import SamplingJournal, JOURNAL_FILE_NAME
 
 
 THIS_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -84,7 +87,9 @@ class ISampling(abc.ABC):
         - For each velocity layer:
             - `self.sample()`
             - Perform the actual sampling for the current program, zone, and velocity
-        5. `self.post_process()`
+        5. `self.post_sampling()`
+        - Perform any necessary cleanup after the sampling process (e.g. wait for pending exports)
+        6. `self.post_process()`
         - Perform post-processing on all recorded samples
         """
         pass
@@ -96,6 +101,13 @@ class ISampling(abc.ABC):
         """
         pass
 
+    @abc.abstractmethod
+    def post_sampling(self):
+        """
+        Do something after sampling process once.
+        """
+        pass
+
     @abc.abstractmethod
     def pre_send_smf(self):
         """
@@ -145,11 +157,14 @@ class ISampling(abc.ABC):
         """
         # Check duplicate sample zone or already recorded file
         # If overwrite_recorded is False, raise exception
+        # (When resuming, an existing file which is not in the journal is an incomplete take of the previous session)
         if not self.overwrite_recorded:
             if(this_time_recorded_path in recorded_path_list):
                 raise ValueError(f"Duplecate sample zone(s) defined in midi-sampling-config file. {this_time_recorded_path.path()}")
             if(os.path.exists(this_time_recorded_path.path())):
-                raise FileExistsError(f"Recorded file already exists. {this_time_recorded_path.path()}")
+                if not self.resume:
+                    raise FileExistsError(f"Recorded file already exists. {this_time_recorded_path.path()}")
+                logger.warning(f"Re-record file not completed in previous session. {this_time_recorded_path.path()}")
         else:
             if(this_time_recorded_path in recorded_path_list):
                 logger.warning(f"Overwrite recorded file. {this_time_recorded_path.path()}")
@@ -163,6 +178,27 @@ class ISampling(abc.ABC):
         """
         pass
 
+    def get_recorded_path(self, program: ProgramChange, zone: SampleZone, velocity: VelocityLayer) -> RecordedAudioPath:
+        """
+        Get the recorded audio path of the sampling item
+        """
+        placeholders = ISampling.placeholder_values(
+            pc_msb=program.msb,
+            pc_lsb=program.lsb,
+            pc_value=program.program,
+            key_root=zone.key_root,
+            key_low=zone.key_low,
+            key_high=zone.key_high,
+            min_velocity=velocity.min_velocity,
+            max_velocity=velocity.max_velocity,
+            velocity=velocity.send_velocity,
+            use_scale_spn_format=self.midi_config.scale_name_format == "SPN"
+        )
+
+        output_file_path = dynamic_format.format(format_string=self.midi_config.output_prefix_format, data=placeholders)
+
+        return RecordedAudioPath(base_dir=self.midi_config.output_dir, file_path=output_file_path + ".wav", placeholders=placeholders)
+
     @classmethod
     def expand_path_placeholder(self, format_string:str, pc_msb:int, pc_lsb:int, pc_value, key_root: int, key_low: int, key_high: int, min_velocity:int, max_velocity:int, velocity: int, use_scale_spn_format: bool):
         """
@@ -192,7 +228,32 @@ class ISampling(abc.ABC):
             str: formatted string
         """
 
-        format_value = {
+        format_value = self.placeholder_values(
+            pc_msb=pc_msb,
+            pc_lsb=pc_lsb,
+            pc_value=pc_value,
+            key_root=key_root,
+            key_low=key_low,
+            key_high=key_high,
+            min_velocity=min_velocity,
+            max_velocity=max_velocity,
+            velocity=velocity,
+            use_scale_spn_format=use_scale_spn_format
+        )
+
+        return dynamic_format.format(format_string=format_string, data=format_value)
+
+    @classmethod
+    def placeholder_values(self, pc_msb:int, pc_lsb:int, pc_value, key_root: int, key_low: int, key_high: int, min_velocity:int, max_velocity:int, velocity: int, use_scale_spn_format: bool) -> dict:
+        """
+        Get the values of the placeholders available in `expand_path_placeholder()`. See `expand_path_placeholder()` for the parameters.
+
+        Returns
+        -------
+            dict: placeholder name to value
+        """
+
+        return {
             # MIDI Controll Change
             "pc_msb": pc_msb,
             "pc_lsb": pc_lsb,
@@ -211,20 +272,20 @@ class ISampling(abc.ABC):
             "max_velocity": max_velocity,
         }
 
-        return dynamic_format.format(format_string=format_string, data=format_value)
-
 class SamplingBase(ISampling):
     """
     Common implementation for sampling
     """
-    def __init__(self, sampling_config: SamplingConfig, midi_config: MidiConfig, postprocess_config: AudioProcessConfig, overwrite_recorded: bool = False):
+    def __init__(self, sampling_config: SamplingConfig, midi_config: MidiConfig, postprocess_config: AudioProcessConfig, overwrite_recorded: bool = False, resume: bool = False):
         self.sampling_config = sampling_config
         self.midi_config = midi_config
         self.postprocess_config = postprocess_config
         self.overwrite_recorded = overwrite_recorded
+        self.resume = resume
 
         self.audio_device: IAudioDevice = None
         self.midi_device: IMidiDevice = None
+        self.journal: SamplingJournal = None
 
     @override
     def initialize(self) -> None:
@@ -254,19 +315,34 @@ class SamplingBase(ISampling):
         finally:
             pass
 
+    def get_sampling_rounds(self) -> List[List[Tuple[int, ProgramChange]]]:
+        """
+        Get the programs played at once in each take: [[(MIDI channel, program), ...], ...]
+        Default: One program per take on `midi_config.midi_channel`.
+        """
+        midi_channel = self.midi_config.midi_channel
+        return [[(midi_channel, program)] for program in self.midi_config.program_change_list]
+
+    def sample_round(self, channel_programs: List[Tuple[int, ProgramChange]], zone: SampleZone, velocity: VelocityLayer, recorded_paths: List[RecordedAudioPath], recorded_path_list: List[RecordedAudioPath]) -> None:
+        """
+        Sample a take of the programs of a round. (`recorded_paths`: Recorded path of each program)
+        Default: `sample()` for each program.
+        """
+        for _, program in channel_programs:
+            self.sample(program, zone, velocity, recorded_path_list)
+
     @override
     def execute(self) -> None:
         """
         Execute sampling
         """
 
-        program_change_list     = self.midi_config.program_change_list
-        midi_channel            = self.midi_config.midi_channel
         sample_zone             = self.midi_config.sample_zone
         processed_output_dir    = self.midi_config.processed_output_dir
+        rounds                  = self.get_sampling_rounds()
 
-        # Calculate total sampling count
-        total_sampling_count = len(program_change_list) * SampleZone.get_total_sample_count(sample_zone)
+        # Calculate total sampling count (Number of takes)
+        total_sampling_count = len(rounds) * SampleZone.get_total_sample_count(sample_zone)
 
         if total_sampling_count == 0:
             logger.warning("No sampling target (Sample zone is empty)")
@@ -288,18 +364,36 @@ class SamplingBase(ISampling):
 
         process_count = 1
 
-        for program in program_change_list:
+        for channel_programs in rounds:
             # Send program change
-            logger.info(f"Program Change - MSB: {program.msb}, LSB: {program.lsb}, Program: {program.program}")
-            self.send_progam_change(midi_channel, program)
+            for channel, program in channel_programs:
+                logger.info(f"Program Change - Channel: {channel:2d}, MSB: {program.msb}, LSB: {program.lsb}, Program: {program.program}")
+                self.send_progam_change(channel, program)
+
+            channels = ", ".join(f"{channel:2d}" for channel, _ in channel_programs)
 
             for zone in sample_zone:
                 for velocity in zone.velocity_layers:
-                    logger.info(f"[{process_count: 4d} / {total_sampling_count:4d}] Note on - Channel: {midi_channel:2d}, Note: {zone.key_root:3d}, Velocity: {velocity.send_velocity:3d} (Key Low:{zone.key_low:3d}, Key High:{zone.key_high:3d}, Min Velocity:{velocity.min_velocity:3d}, Max Velocity:{velocity.max_velocity:3d})")
-                    self.sample(program, zone, velocity, recorded_path_list)
+                    recorded_paths = [self.get_recorded_path(program, zone, velocity) for _, program in channel_programs]
+
+                    # Resume: Skip the take only if all of the programs are completed in previous session
+                    if self.journal and all(
+                        self.journal.is_completed(program, zone, velocity, path)
+                        for (_, program), path in zip(channel_programs, recorded_paths)
+                    ):
+                        logger.info(f"[{process_count: 4d} / {total_sampling_count:4d}] Skip (Completed in previous session) - Note: {zone.key_root:3d}, Velocity: {velocity.send_velocity:3d}")
+                        recorded_path_list.extend(recorded_paths)
+                        process_count += 1
+                        continue
+
+                    logger.info(f"[{process_count: 4d} / {total_sampling_count:4d}] Note on - Channel: {channels}, Note: {zone.key_root:3d}, Velocity: {velocity.send_velocity:3d} (Key Low:{zone.key_low:3d}, Key High:{zone.key_high:3d}, Min Velocity:{velocity.min_velocity:3d}, Max Velocity:{velocity.max_velocity:3d})")
+                    self.sample_round(channel_programs, zone, velocity, recorded_paths, recorded_path_list)
 
                     process_count += 1
 
+        # Do something after sampling process once.
+        self.post_sampling()
+
         #---------------------------------------------------------------------------
         # Post Process
         #---------------------------------------------------------------------------
@@ -313,8 +407,8 @@ class DefaultSampling(SamplingBase):
     """
     Default implementation of the ISampling interface
     """
-    def __init__(self, sampling_config: SamplingConfig, midi_config: MidiConfig, postprocess_config: AudioProcessConfig, overwrite_recorded: bool = False):
-        super().__init__(sampling_config, midi_config, postprocess_config, overwrite_recorded)
+    def __init__(self, sampling_config: SamplingConfig, midi_config: MidiConfig, postprocess_config: AudioProcessConfig, overwrite_recorded: bool = False, resume: bool = False):
+        super().__init__(sampling_config, midi_config, postprocess_config, overwrite_recorded, resume)
 
     @override
     def create_midi_device(self) -> IMidiDevice:
@@ -326,13 +420,21 @@ class DefaultSampling(SamplingBase):
             f"{self.sampling_config.audio_sample_bits_format}{self.sampling_config.audio_sample_bits}"
         )
 
+        # Longest take recorded in memory in this session. Recording buffers are preallocated for it.
+        max_record_duration = None
+        record_durations = [sum(self.get_durations(x)) for x in self.midi_config.sample_zone]
+        record_durations = [x for x in record_durations if not self.is_stream_to_disk(x)]
+        if len(record_durations) > 0:
+            max_record_duration = max(record_durations)
+
         audio_option: AudioDeviceOption = AudioDeviceOption(
             device_name=self.sampling_config.audio_in_device,
             device_platform=self.sampling_config.audio_in_device_platform,
             sample_rate=self.sampling_config.audio_sample_rate,
             channels=self.sampling_config.audio_channels,
             data_format=audio_data_format,
-            input_ports=self.sampling_config.asio_audio_ins
+            input_ports=self.sampling_config.asio_audio_ins,
+            max_record_duration=max_record_duration
         )
         return SdAudioDevice(audio_option)
 
@@ -340,6 +442,19 @@ class DefaultSampling(SamplingBase):
     def pre_sampling(self):
         os.makedirs(self.midi_config.output_dir, exist_ok=True)
 
+        # Completed items are journaled to resume an interrupted session
+        self.journal = SamplingJournal(os.path.join(self.midi_config.output_dir, JOURNAL_FILE_NAME))
+        if self.resume:
+            self.journal.load()
+        else:
+            self.journal.clear()
+
+    @override
+    def post_sampling(self):
+        # Recorded files are written in the background. Wait for them before post process.
+        logger.info("Wait for pending exports...")
+        self.audio_device.wait_for_export()
+
     @override
     def pre_send_smf(self):
         pre_send_smf_path_list = self.midi_config.pre_send_smf_path_list
@@ -354,66 +469,111 @@ class DefaultSampling(SamplingBase):
     def send_progam_change(self, channel: int, program: ProgramChange):
         self.midi_device.send_progam_change(channel, program.msb, program.lsb, program.program)
 
-    @override
-    def sample(self, program: ProgramChange, zone: SampleZone, velocity: VelocityLayer, recorded_path_list: List[RecordedAudioPath]) -> None:
-        midi_channel          = self.midi_config.midi_channel
-        midi_note_duration    = self.midi_config.midi_note_duration
+    def get_durations(self, zone: SampleZone) -> Tuple[float, float, float]:
+        """
+        Get (pre wait, note, release) durations in seconds for the zone.
+        Durations defined in the zone override the MIDI config.
+        """
         midi_pre_duration     = self.midi_config.midi_pre_wait_duration
+        midi_note_duration    = self.midi_config.midi_note_duration
         midi_release_duration = self.midi_config.midi_release_duration
-        scale_name_format     = self.midi_config.scale_name_format
-        output_dir            = self.midi_config.output_dir
 
-        # Override note duration if note_duration is defined in zone
         if zone.note_duration >= 0:
             midi_note_duration = zone.note_duration
-            logger.debug(f"Note duration override from zone: {midi_note_duration}")
         if zone.release_duration >= 0:
             midi_release_duration = zone.release_duration
+
+        return midi_pre_duration, midi_note_duration, midi_release_duration
+
+    def is_stream_to_disk(self, record_duration: float) -> bool:
+        """
+        Whether a take of record_duration seconds is streamed straight to disk while recording.
+        """
+        min_duration = self.sampling_config.audio_stream_to_disk_min_duration
+        return min_duration is not None and record_duration >= min_duration
+
+    def record_take(self, zone: SampleZone, notes: List[Tuple[int, int]], stream_to: str = None, on_exported: Callable[[], None] = None) -> None:
+        """
+        Play MIDI note(s) and record a take of the zone.
+
+        Parameters
+        ----------
+        zone : SampleZone
+            Key zone to be sampled (Used for durations)
+        notes : List[Tuple[int, int]]
+            (MIDI channel, velocity) of the note(s) played together at zone.key_root
+        stream_to : str
+            If specified, the take is streamed straight to this file path
+        on_exported : Callable[[], None]
+            Called after the streamed file is written
+        """
+        midi_pre_duration, midi_note_duration, midi_release_duration = self.get_durations(zone)
+
+        if zone.note_duration >= 0:
+            logger.debug(f"Note duration override from zone: {midi_note_duration}")
+        if zone.release_duration >= 0:
             logger.debug(f"Release duration override from zone: {midi_release_duration}")
 
         # Record Audio
-        record_duration = math.ceil(midi_pre_duration + midi_note_duration + midi_release_duration)
+        record_duration = midi_pre_duration + midi_note_duration + midi_release_duration
         logger.debug(f"Pre wait duration: {midi_pre_duration}")
         logger.debug(f"Note duration: {midi_note_duration}")
         logger.debug(f"Release duration: {midi_release_duration}")
-        logger.debug(f"Record duration(*ceiling ): {record_duration}")
+        logger.debug(f"Record duration: {record_duration}")
 
-        self.audio_device.start_recording(record_duration)
+        if stream_to:
+            logger.debug(f"  -> Stream to: {stream_to}")
+            self.audio_device.start_recording_to_file(record_duration, stream_to, on_exported)
+        else:
+            self.audio_device.start_recording(record_duration)
 
         if midi_pre_duration > 0:
             time.sleep(midi_pre_duration)
 
         # Play MIDI
-        self.midi_device.play_note(midi_channel, zone.key_root, velocity.send_velocity, midi_note_duration)
-
-        if midi_release_duration > 0:
+        if len(notes) == 1:
+            channel, velocity = notes[0]
+            self.midi_device.play_note(channel, zone.key_root, velocity, midi_note_duration)
+        else:
+            self.midi_device.play_notes([(channel, zone.key_root, velocity) for channel, velocity in notes], midi_note_duration)
+
+        # Release
+        # Adaptive: stop_recording() returns when the tail decays (or at the end of release duration)
+        adaptive_release = self.midi_config.adaptive_release
+        if adaptive_release:
+            self.audio_device.end_recording_on_silence(adaptive_release.threshold_dBFS, adaptive_release.hold_ms / 1000)
+        elif midi_release_duration > 0:
             time.sleep(midi_release_duration)
 
         self.audio_device.stop_recording()
 
-        # Save Audio
-        output_file_path = ISampling.expand_path_placeholder(
-            format_string=self.midi_config.output_prefix_format,
-            pc_msb=program.msb,
-            pc_lsb=program.lsb,
-            pc_value=program.program,
-            key_root=zone.key_root,
-            key_low=zone.key_low,
-            key_high=zone.key_high,
-            min_velocity=velocity.min_velocity,
-            max_velocity=velocity.max_velocity,
-            velocity=velocity.send_velocity,
-            use_scale_spn_format=scale_name_format == "SPN"
-        )
+    @override
+    def sample(self, program: ProgramChange, zone: SampleZone, velocity: VelocityLayer, recorded_path_list: List[RecordedAudioPath]) -> None:
+        midi_channel = self.midi_config.midi_channel
 
-        export_path = RecordedAudioPath(base_dir=output_dir, file_path=output_file_path + ".wav")
-        export_path.makedirs()
+        # Export path (Validate before recording to fail fast)
+        export_path = self.get_recorded_path(program, zone, velocity)
+        self.validate_recorded_file(export_path, recorded_path_list)
 
-        logger.debug(f"  -> Export recorded data to: {export_path.path()}")
+        # Journal the item after the file is written
+        journal = self.journal
+        def on_exported() -> None:
+            journal.append(program, zone, velocity, export_path)
 
-        self.validate_recorded_file(export_path, recorded_path_list)
+        stream_to_disk = self.is_stream_to_disk(sum(self.get_durations(zone)))
+
+        self.record_take(
+            zone=zone,
+            notes=[(midi_channel, velocity.send_velocity)],
+            stream_to=export_path.path() if stream_to_disk else None,
+            on_exported=on_exported
+        )
+
+        # Save Audio (Written in the background, the next take can start right away)
+        if not stream_to_disk:
+            logger.debug(f"  -> Export recorded data to: {export_path.path()}")
+            self.audio_device.export_audio(export_path.path(), on_exported)
 
-        self.audio_device.export_audio(export_path.path())
         recorded_path_list.append(export_path)
 
     @override
@@ -424,13 +584,281 @@ class DefaultSampling(SamplingBase):
             output_dir=processed_output_dir
         )
 
+class MultitimbralSampling(DefaultSampling):
+    """
+    Sampling of a multitimbral MIDI device.
+    Programs are assigned to `midi_config.multitimbral_parts` in order and played at once.
+    Each take is captured once and split into per-part files by audio channels.
+    """
+    def __init__(self, sampling_config: SamplingConfig, midi_config: MidiConfig, postprocess_config: AudioProcessConfig, overwrite_recorded: bool = False, resume: bool = False):
+        super().__init__(sampling_config, midi_config, postprocess_config, overwrite_recorded, resume)
+
+        for part in midi_config.multitimbral_parts:
+            for x in part.audio_channels:
+                if x >= sampling_config.audio_channels:
+                    raise ValueError(f"multitimbral_parts: audio channel index out of range: {x} (audio_channels={sampling_config.audio_channels})")
+
+    @override
+    def is_stream_to_disk(self, record_duration: float) -> bool:
+        # A take is split into multiple files after recording
+        return False
+
+    @override
+    def get_sampling_rounds(self) -> List[List[Tuple[int, ProgramChange]]]:
+        # Programs are assigned to the parts in order (The i-th program of a round is played by the i-th part)
+        program_change_list = self.midi_config.program_change_list
+        parts               = self.midi_config.multitimbral_parts
+
+        rounds: List[List[Tuple[int, ProgramChange]]] = []
+        for i in range(0, len(program_change_list), len(parts)):
+            rounds.append([(part.midi_channel, program) for part, program in zip(parts, program_change_list[i:i + len(parts)])])
+        return rounds
+
+    @override
+    def sample_round(self, channel_programs: List[Tuple[int, ProgramChange]], zone: SampleZone, velocity: VelocityLayer, recorded_paths: List[RecordedAudioPath], recorded_path_list: List[RecordedAudioPath]) -> None:
+        part_programs = [(part, program) for part, (_, program) in zip(self.midi_config.multitimbral_parts, channel_programs)]
+        self.sample_parts(part_programs, zone, velocity, recorded_paths, recorded_path_list)
+
+    def sample_parts(self, part_programs: List[Tuple[MultitimbralPart, ProgramChange]], zone: SampleZone, velocity: VelocityLayer, recorded_paths: List[RecordedAudioPath], recorded_path_list: List[RecordedAudioPath]) -> None:
+        """
+        Record a take of all parts at once and export a file per part.
+        """
+        # Validate before recording to fail fast
+        for path in recorded_paths:
+            self.validate_recorded_file(path, recorded_path_list)
+            recorded_path_list.append(path)
+
+        self.record_take(
+            zone=zone,
+            notes=[(part.midi_channel, velocity.send_velocity) for part, _ in part_programs]
+        )
+
+        # Save Audio (Written in the background, the next take can start right away)
+        journal = self.journal
+        for (part, program), export_path in zip(part_programs, recorded_paths):
+            def on_exported(program=program, export_path=export_path) -> None:
+                journal.append(program, zone, velocity, export_path)
+
+            logger.debug(f"  -> Export channels {part.audio_channels} to: {export_path.path()}")
+            self.audio_device.export_audio(export_path.path(), on_exported, channels=part.audio_channels)
+
+class ShardedSampling(SamplingBase):
+    """
+    Sampling with multiple identical rigs (`sampling_config.rigs`) in parallel.
+
+    The sampling plan is split into contiguous chunks, one per rig, and each rig runs
+    its own DefaultSampling worker (with its own MIDI port and audio stream) on a thread.
+    All rigs write to the same output directory and share the journal.
+    Post process runs once for all recorded files.
+    """
+    def __init__(self, sampling_config: SamplingConfig, midi_config: MidiConfig, postprocess_config: AudioProcessConfig, overwrite_recorded: bool = False, resume: bool = False):
+        super().__init__(sampling_config, midi_config, postprocess_config, overwrite_recorded, resume)
+
+        if len(sampling_config.rigs) == 0:
+            raise ValueError("No rigs defined in sampling config.")
+        if len(midi_config.multitimbral_parts) > 0:
+            raise ValueError("multitimbral_parts is not supported with rigs.")
+
+        self.workers: List[DefaultSampling] = []
+        self.stop_event = threading.Event()
+
+    @override
+    def initialize(self) -> None:
+        for i, rig in enumerate(self.sampling_config.rigs):
+            logger.info(f"Initialize rig #{i}: {rig}")
+            worker = DefaultSampling(
+                sampling_config=self.sampling_config.for_rig(rig),
+                midi_config=self.midi_config,
+                postprocess_config=None,
+                overwrite_recorded=self.overwrite_recorded,
+                resume=self.resume
+            )
+            # Add first to dispose the devices of a partially initialized worker
+            self.workers.append(worker)
+            worker.initialize()
+
+    @override
+    def dispose(self) -> None:
+        for worker in self.workers:
+            try:
+                worker.dispose()
+            except Exception as e:
+                logger.error(f"Failed to dispose rig: {e}")
+
+    @override
+    def create_midi_device(self) -> IMidiDevice:
+        # Each worker has its own MIDI device
+        return None
+
+    @override
+    def create_audio_device(self) -> IAudioDevice:
+        # Each worker has its own audio device
+        return None
+
+    @override
+    def pre_sampling(self):
+        os.makedirs(self.midi_config.output_dir, exist_ok=True)
+
+        # One journal shared by all rigs
+        self.journal = SamplingJournal(os.path.join(self.midi_config.output_dir, JOURNAL_FILE_NAME))
+        if self.resume:
+            self.journal.load()
+        else:
+            self.journal.clear()
+
+        for worker in self.workers:
+            worker.journal = self.journal
+
+    @override
+    def post_sampling(self):
+        for worker in self.workers:
+            worker.post_sampling()
+
+    @override
+    def pre_send_smf(self):
+        # Every rig is set up with the same MIDI files
+        for worker in self.workers:
+            worker.pre_send_smf()
+
+    @override
+    def send_progam_change(self, channel: int, program: ProgramChange):
+        for worker in self.workers:
+            worker.send_progam_change(channel, program)
+
+    @override
+    def sample(self, program: ProgramChange, zone: SampleZone, velocity: VelocityLayer, recorded_path_list: List[RecordedAudioPath]) -> None:
+        """
+        Not supported. Items are assigned to rigs by `execute()` and sampled by the worker of each rig. (See `sample_chunk()`)
+        """
+        raise NotImplementedError("Sharded sampling assigns items to rigs in execute(). Call sample() of the worker of the rig instead.")
+
+    @override
+    def execute(self) -> None:
+        """
+        Execute sampling
+        """
+
+        midi_channel            = self.midi_config.midi_channel
+        processed_output_dir    = self.midi_config.processed_output_dir
+
+        # Sampling plan: [(program, zone, velocity), ...]
+        plan: List[Tuple[ProgramChange, SampleZone, VelocityLayer]] = []
+        for program in self.midi_config.program_change_list:
+            for zone in self.midi_config.sample_zone:
+                for velocity in zone.velocity_layers:
+                    plan.append((program, zone, velocity))
+
+        if len(plan) == 0:
+            logger.warning("No sampling target (Sample zone is empty)")
+            return
+
+        recorded_paths = [self.get_recorded_path(*x) for x in plan]
+
+        #---------------------------------------------------------------------------
+        # Sampling
+        #---------------------------------------------------------------------------
+
+        # Send MIDI from file to device before sampling
+        self.pre_send_smf()
+
+        # Do something before sampling process once.
+        self.pre_sampling()
+
+        # Resume: Items completed in previous session are not assigned to any rig
+        # Check duplicate paths of the whole plan before recording (Each rig validates its own files only)
+        pending_indices: List[int] = []
+        checked_path_list: List[RecordedAudioPath] = []
+        for i, (program, zone, velocity) in enumerate(plan):
+            if not self.journal.is_completed(program, zone, velocity, recorded_paths[i]):
+                self.validate_recorded_file(recorded_paths[i], checked_path_list)
+                pending_indices.append(i)
+            checked_path_list.append(recorded_paths[i])
+        if len(pending_indices) < len(plan):
+            logger.info(f"Skip {len(plan) - len(pending_indices)} item(s) completed in previous session")
+
+        # Contiguous chunks keep program changes to a minimum
+        chunk_size = max(1, math.ceil(len(pending_indices) / len(self.workers)))
+        chunks     = [pending_indices[i:i + chunk_size] for i in range(0, len(pending_indices), chunk_size)]
+
+        error: Exception = None
+
+        if len(chunks) == 0:
+            # e.g. Resume a completed session: Only post process
+            logger.info("Nothing to sample (All items are completed in previous session)")
+        else:
+            logger.info(f"Sampling... ({len(chunks)} rig(s), {len(pending_indices)} item(s))")
+
+            with ThreadPoolExecutor(max_workers=len(chunks), thread_name_prefix="SamplingRig") as executor:
+                futures = [
+                    executor.submit(self.sample_chunk, rig_index, self.workers[rig_index], midi_channel, [(i, *plan[i]) for i in chunk])
+                    for rig_index, chunk in enumerate(chunks)
+                ]
+
+                for future in futures:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        if error is None:
+                            error = e
+
+        if error is not None:
+            # Keep files written by the other rigs in the journal
+            try:
+                self.post_sampling()
+            finally:
+                raise error
+
+        # Do something after sampling process once.
+        self.post_sampling()
+
+        #---------------------------------------------------------------------------
+        # Post Process
+        #---------------------------------------------------------------------------
+        logger.info("#" * 80)
+        logger.info("Post process")
+        logger.info("#" * 80)
+        self.post_process(self.postprocess_config, recorded_paths, processed_output_dir)
+
+    def sample_chunk(self, rig_index: int, worker: DefaultSampling, midi_channel: int, items: List[Tuple[int, ProgramChange, SampleZone, VelocityLayer]]) -> None:
+        """
+        Sample a chunk of the plan with a rig. (Called on a worker thread)
+        """
+        recorded_path_list: List[RecordedAudioPath] = []
+        current_program: ProgramChange = None
+
+        try:
+            for count, (index, program, zone, velocity) in enumerate(items, start=1):
+                # Another rig failed
+                if self.stop_event.is_set():
+                    logger.warning(f"[Rig #{rig_index}] Stopped")
+                    return
+
+                if program is not current_program:
+                    logger.info(f"[Rig #{rig_index}] Program Change - MSB: {program.msb}, LSB: {program.lsb}, Program: {program.program}")
+                    worker.send_progam_change(midi_channel, program)
+                    current_program = program
+
+                logger.info(f"[Rig #{rig_index}] [{count: 4d} / {len(items):4d}] (#{index + 1}) Note on - Channel: {midi_channel:2d}, Note: {zone.key_root:3d}, Velocity: {velocity.send_velocity:3d}")
+                worker.sample(program, zone, velocity, recorded_path_list)
+        except:
+            self.stop_event.set()
+            raise
+
+    @override
+    def post_process(self, config: AudioProcessConfig, recorded_path_list: List[RecordedAudioPath], processed_output_dir: str):
+        run_postprocess(
+            config=config,
+            recorded_files=recorded_path_list,
+            output_dir=processed_output_dir
+        )
+
 class DryRunSampling(SamplingBase):
     """
     Dry run implementation of the ISampling interface.
     This class does not perform actual sampling. But print out the sampling process.
     """
-    def __init__(self, sampling_config: SamplingConfig, midi_config: MidiConfig, postprocess_config: AudioProcessConfig, overwrite_recorded: bool = False):
-        super().__init__(sampling_config, midi_config, postprocess_config, overwrite_recorded)
+    def __init__(self, sampling_config: SamplingConfig, midi_config: MidiConfig, postprocess_config: AudioProcessConfig, overwrite_recorded: bool = False, resume: bool = False):
+        super().__init__(sampling_config, midi_config, postprocess_config, overwrite_recorded, resume)
 
     @override
     def initialize(self) -> None:
@@ -446,6 +874,13 @@ class DryRunSampling(SamplingBase):
 
     @override
     def pre_sampling(self):
+        # Read only: Show which items would be skipped when resuming
+        if self.resume:
+            self.journal = SamplingJournal(os.path.join(self.midi_config.output_dir, JOURNAL_FILE_NAME))
+            self.journal.load()
+
+    @override
+    def post_sampling(self):
         pass
 
     @override
@@ -458,24 +893,7 @@ class DryRunSampling(SamplingBase):
 
     @override
     def sample(self, program: ProgramChange, zone: SampleZone, velocity: VelocityLayer, recorded_path_list: List[RecordedAudioPath]) -> None:
-        scale_name_format = self.midi_config.scale_name_format
-        output_dir        = self.midi_config.output_dir
-
-        output_file_path = ISampling.expand_path_placeholder(
-            format_string=self.midi_config.output_prefix_format,
-            pc_msb=program.msb,
-            pc_lsb=program.lsb,
-            pc_value=program.program,
-            key_root=zone.key_root,
-            key_low=zone.key_low,
-            key_high=zone.key_high,
-            min_velocity=velocity.min_velocity,
-            max_velocity=velocity.max_velocity,
-            velocity=velocity.send_velocity,
-            use_scale_spn_format=scale_name_format == "SPN"
-        )
-
-        export_path = RecordedAudioPath(base_dir=output_dir, file_path=output_file_path + ".wav")
+        export_path = self.get_recorded_path(program, zone, velocity)
 
         self.validate_recorded_file(export_path, recorded_path_list)
         recorded_path_list.append(export_path)
@@ -25,6 +25,7 @@ def main() -> None:
     parser.add_argument("input_directory", help="Path to the input directory with audio files (*.wav).")
     parser.add_argument("output_directory", help="Path to the output directory to save the processed audio files.")
     parser.add_argument("-l", "--log-file", help="Path to save the log file.")
+    parser.add_argument("-j", "--jobs", type=int, help="Number of worker processes to process files in parallel. 0 uses all CPU cores. (Overrides `jobs` in the processing configuration)")
 
     log_level_group = parser.add_mutually_exclusive_group()
     log_level_group.add_argument("-v", "--verbose", help="Enable verbose logging.", action="store_true")
@@ -53,6 +54,9 @@ def main() -> None:
         process_config = AudioProcessConfig(args.processing_config_path)
         validate_effect_config(process_config)
 
+        if args.jobs is not None:
+            process_config.jobs = args.jobs
+
         sources: List[RecordedAudioPath] = RecordedAudioPath.from_directory(args.input_directory)
 
         process(
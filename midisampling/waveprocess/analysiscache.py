@@ -0,0 +1,153 @@
+from typing import Dict, Iterable, Optional
+import os
+import json
+import tempfile
+
+from logging import getLogger
+
+from midisampling.waveprocess.wavpeak import WavStats
+
+logger = getLogger(__name__)
+
+ANALYSIS_CACHE_FILE_NAME = ".midisampling-analysis-cache.jsonl"
+"""
+File name of the analysis cache in the processed output directory.
+"""
+
+def save_jsonl(file_path: str, entries: Iterable[dict]) -> None:
+    """
+    Write entries to the file in JSON Lines format. (Replaced atomically)
+    """
+    file_dir = os.path.dirname(os.path.abspath(file_path))
+    os.makedirs(file_dir, exist_ok=True)
+
+    fd, temp_path = tempfile.mkstemp(dir=file_dir, prefix=".tmp-", suffix=".jsonl")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+        os.replace(temp_path, file_path)
+    except:
+        os.remove(temp_path)
+        raise
+
+class FileFingerprint:
+    """
+    Identifies the content of a file without reading it. (path + size + modification time)
+    """
+    def __init__(self, path: str, size: int, mtime_ns: int):
+        self.path: str     = path
+        self.size: int     = size
+        self.mtime_ns: int = mtime_ns
+
+    @classmethod
+    def from_path(cls, file_path: str) -> 'FileFingerprint':
+        path = os.path.normpath(os.path.abspath(file_path))
+        stat = os.stat(path)
+        return FileFingerprint(path=path, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+
+    def to_dict(self) -> dict:
+        return {"path": self.path, "size": self.size, "mtime_ns": self.mtime_ns}
+
+    @classmethod
+    def from_dict(cls, values: dict) -> 'FileFingerprint':
+        return FileFingerprint(path=values["path"], size=values["size"], mtime_ns=values["mtime_ns"])
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, FileFingerprint):
+            return False
+        return (
+            self.path == other.path
+            and self.size == other.size
+            and self.mtime_ns == other.mtime_ns
+        )
+
+    def __hash__(self) -> int:
+        return hash((self.path, self.size, self.mtime_ns))
+
+    def __str__(self) -> str:
+        return f"path={self.path}, size={self.size}, mtime_ns={self.mtime_ns}"
+
+class AnalysisCache:
+    """
+    Persistent cache of per-file statistics (peak, RMS, frames) in JSON Lines format.
+    An entry is valid while the size and modification time of the file are unchanged.
+
+    Examples
+    --------
+
+    ```python
+    cache = AnalysisCache(os.path.join(output_dir, ANALYSIS_CACHE_FILE_NAME))
+    cache.load()
+
+    stats = cache.get(file_path)
+    if stats is None:
+        stats = wavpeak.scan_stats(file_path)
+        cache.put(file_path, stats)
+
+    cache.save()
+    ```
+    """
+
+    def __init__(self, cache_path: str) -> None:
+        self.cache_path: str                    = cache_path
+        self.entries: Dict[str, dict]           = {}
+        self.modified: bool                     = False
+
+    def load(self) -> None:
+        """
+        Load entries from the cache file. Does nothing if the file does not exist.
+        """
+        self.entries  = {}
+        self.modified = False
+
+        if not os.path.exists(self.cache_path):
+            return
+
+        with open(self.cache_path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, start=1):
+                line = line.strip()
+                if len(line) == 0:
+                    continue
+                try:
+                    entry = json.loads(line)
+                    self.entries[entry["path"]] = entry
+                except (json.JSONDecodeError, KeyError):
+                    logger.warning(f"Ignore broken analysis cache entry: {self.cache_path}:{line_no}")
+
+        logger.info(f"Loaded analysis cache: {len(self.entries)} file(s) in {self.cache_path}")
+
+    def get(self, file_path: str) -> Optional[WavStats]:
+        """
+        Get the cached statistics of the file. None if not cached or the file is changed.
+        """
+        fingerprint = FileFingerprint.from_path(file_path)
+        entry       = self.entries.get(fingerprint.path)
+
+        if entry is None:
+            return None
+        if FileFingerprint.from_dict(entry) != fingerprint:
+            return None
+
+        return WavStats.from_dict(entry["stats"])
+
+    def put(self, file_path: str, stats: WavStats) -> None:
+        fingerprint = FileFingerprint.from_path(file_path)
+
+        entry = fingerprint.to_dict()
+        entry["stats"] = stats.to_dict()
+
+        self.entries[fingerprint.path] = entry
+        self.modified = True
+
+    def save(self) -> None:
+        """
+        Write all entries to the cache file. (Replaced atomically)
+        """
+        if not self.modified:
+            return
+
+        save_jsonl(self.cache_path, self.entries.values())
+
+        self.modified = False
+        logger.debug(f"Saved analysis cache: {len(self.entries)} file(s) in {self.cache_path}")
@@ -0,0 +1,204 @@
+from typing import Dict
+import math
+
+from logging import getLogger
+
+import numpy as np
+import soundfile as sf
+
+import midisampling.rf64 as rf64
+
+logger = getLogger(__name__)
+
+SUBTYPE_TABLE: Dict[str, str] = {
+    "int16": "PCM_16",
+    "int24": "PCM_24",
+    "int32": "PCM_32",
+    "float32": "FLOAT",
+}
+"""
+Table of `bit_depth` in the audio process config to soundfile subtype.
+"""
+
+PCM_BITS_TABLE: Dict[str, int] = {
+    "PCM_16": 16,
+    "PCM_24": 24,
+    "PCM_32": 32,
+}
+"""
+Table of soundfile PCM subtype to bits.
+"""
+
+DITHER_BITS = [16, 24]
+"""
+PCM bits which are dithered when `dither` is enabled.
+"""
+
+def ratio_to_dB(ratio: float) -> float:
+    if ratio <= 0:
+        return -math.inf
+    return 20.0 * math.log10(ratio)
+
+def dB_to_ratio(dB: float) -> float:
+    return 10.0 ** (dB / 20.0)
+
+def read_samples(f: sf.SoundFile, frames: int = -1) -> np.ndarray:
+    """
+    Read `frames` frames (-1: to the end) from the current position in shape (frames, channels). Full scale is 1.0.
+    """
+    if f.subtype in PCM_BITS_TABLE:
+        # Integer samples are read as int32 (left aligned) and scaled exactly
+        return f.read(frames, dtype="int32", always_2d=True).astype(np.float64) / 2.0**31
+    return f.read(frames, dtype="float64", always_2d=True)
+
+def can_dither(subtype: str) -> bool:
+    """
+    Whether `subtype` is dithered when `dither` is enabled. (See `DITHER_BITS`)
+    """
+    return PCM_BITS_TABLE.get(subtype) in DITHER_BITS
+
+def output_subtype(source_subtype: str, bit_depth: str = None) -> str:
+    """
+    Get the soundfile subtype to write. (`bit_depth` in the audio process config, None: Same as the source)
+    """
+    if bit_depth:
+        return SUBTYPE_TABLE[bit_depth]
+    return source_subtype
+
+class AudioData:
+    """
+    In-memory audio samples for the post process.
+
+    Samples are stored as float64 in shape (frames, channels) and full scale is 1.0.
+    Integer formats are converted to / from full scale exactly (2^(bits-1)), so reading and writing
+    the same format without processing does not change the samples.
+    """
+
+    def __init__(self, samples: np.ndarray, sample_rate: int, subtype: str) -> None:
+        """
+        Parameters
+        ----------
+            samples:
+                Samples in shape (frames, channels)
+            sample_rate:
+                Sample rate in Hz
+            subtype:
+                soundfile subtype of the source (Used when writing without `bit_depth`)
+        """
+        self.samples: np.ndarray = samples
+        self.sample_rate: int    = sample_rate
+        self.subtype: str        = subtype
+
+    @classmethod
+    def read(cls, file_path: str) -> 'AudioData':
+        """
+        Read a wav file. (RIFF, RF64 or BW64)
+        """
+        with rf64.soundfile_source(file_path) as source, sf.SoundFile(source, "r") as f:
+            return AudioData(read_samples(f), f.samplerate, f.subtype)
+
+    def write(self, file_path: str, bit_depth: str = None, dither: bool = False) -> None:
+        """
+        Write to a wav file.
+
+        Parameters
+        ----------
+            file_path:
+                Output file path
+            bit_depth:
+                `int16`, `int24`, `int32` or `float32`. If not specified, the format of the source is used.
+            dither:
+                Add TPDF dither when quantizing to 16 or 24 bits. (See `to_pcm()`)
+                Files which are already exact at the bits (e.g. Trimmed only) are not dithered, so they are not changed.
+
+        Written as RF64 if the file could exceed 4 GB.
+        """
+        subtype     = output_subtype(self.subtype, bit_depth)
+        file_format = rf64.soundfile_format(self.frames, self.channels, subtype)
+        dither      = dither and can_dither(subtype) and not self.is_exact(PCM_BITS_TABLE[subtype])
+
+        sf.write(file=file_path, data=self.encode(subtype, dither), samplerate=self.sample_rate, subtype=subtype, format=file_format)
+
+    def encode(self, subtype: str, dither: bool = False) -> np.ndarray:
+        """
+        Convert the samples to the data to write as `subtype` by soundfile.
+        `dither` is decided for the whole file by the caller (See `write()`), so all blocks of a file are dithered alike.
+        """
+        if subtype in PCM_BITS_TABLE:
+            return self.to_pcm(PCM_BITS_TABLE[subtype], dither=dither and can_dither(subtype))
+        if subtype == "FLOAT":
+            return self.samples.astype(np.float32)
+
+        # Other formats are converted by soundfile (libsndfile)
+        return self.samples
+
+    def to_pcm(self, bits: int, dither: bool = False) -> np.ndarray:
+        """
+        Quantize to `bits` integer samples, left aligned in int32 for soundfile.
+        Samples over full scale are clipped.
+
+        With `dither`, TPDF (triangular, +-1 LSB) noise is added before rounding.
+        """
+        full_scale = 2.0 ** (bits - 1)
+        scaled     = self.samples * full_scale
+
+        if dither:
+            scaled += np.random.default_rng().triangular(-1.0, 0.0, 1.0, size=scaled.shape)
+
+        quantized = np.rint(scaled, out=scaled)
+        np.clip(quantized, -full_scale, full_scale - 1, out=quantized)
+
+        return quantized.astype(np.int32) << (32 - bits)
+
+    def is_exact(self, bits: int) -> bool:
+        """
+        Whether the samples are exact at `bits` integer samples. (Quantizing does not change them)
+        """
+        scaled = self.samples * 2.0 ** (bits - 1)
+        return np.array_equal(scaled, np.rint(scaled))
+
+    @property
+    def frames(self) -> int:
+        return self.samples.shape[0]
+
+    @property
+    def channels(self) -> int:
+        return self.samples.shape[1]
+
+    def __len__(self) -> int:
+        """
+        Length in milliseconds (Compatible with pydub.AudioSegment)
+        """
+        return round(1000 * self.frames / self.sample_rate)
+
+    def ms_to_frames(self, ms: float) -> int:
+        return int(ms * self.sample_rate / 1000)
+
+    def get_frames(self, begin: int, end: int) -> np.ndarray:
+        """
+        Get the samples of frames [begin, end). (Same as AudioStream)
+        """
+        return self.samples[begin:end]
+
+    def peak(self) -> float:
+        if self.frames == 0:
+            return 0.0
+        return float(np.max(np.abs(self.samples)))
+
+    @property
+    def max_dBFS(self) -> float:
+        return ratio_to_dB(self.peak())
+
+    def apply_gain(self, gain_dB: float) -> 'AudioData':
+        return AudioData(self.samples * dB_to_ratio(gain_dB), self.sample_rate, self.subtype)
+
+    def slice_ms(self, start_ms: int, end_ms: int) -> 'AudioData':
+        """
+        Get a zero-copy slice in milliseconds.
+        """
+        start = self.ms_to_frames(start_ms)
+        end   = self.ms_to_frames(end_ms)
+        return AudioData(self.samples[start:end], self.sample_rate, self.subtype)
+
+    def __str__(self) -> str:
+        return f"frames={self.frames}, channels={self.channels}, sample_rate={self.sample_rate}, subtype={self.subtype}"
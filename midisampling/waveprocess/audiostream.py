@@ -0,0 +1,156 @@
+from typing import Iterator, List
+
+from logging import getLogger
+
+import numpy as np
+import soundfile as sf
+
+import midisampling.rf64 as rf64
+from midisampling.waveprocess.audiodata import AudioData, PCM_BITS_TABLE, read_samples, output_subtype, can_dither, ratio_to_dB, dB_to_ratio
+
+logger = getLogger(__name__)
+
+STREAM_BLOCK_FRAMES = 65536
+"""
+Number of frames read, processed and written at once.
+"""
+
+class AudioStream:
+    """
+    A frame range of a wav file with gains, read block by block. Used instead of AudioData for long files.
+    Memory does not depend on the length of the file.
+
+    Has the same interface as AudioData used by the effects which support streaming:
+    `frames`, `channels`, `sample_rate`, `len()`, `get_frames()`, `max_dBFS`, `apply_gain()`, `slice_ms()` and `write()`.
+    Results are the same as AudioData. (Samples are read and gains are applied in the same way)
+
+    Examples
+    --------
+
+    ```python
+    audio = AudioStream.open("input.wav")
+    audio = audio.apply_gain(-3.0).slice_ms(100, 2000)
+    audio.write("output.wav", bit_depth="int24")
+    ```
+    """
+
+    def __init__(self, file_path: str, sample_rate: int, channels: int, subtype: str, begin: int, end: int, gains: List[float] = None) -> None:
+        """
+        Parameters
+        ----------
+            begin, end:
+                Frame range [begin, end) in the file
+            gains:
+                Gain ratios applied in order
+        """
+        self.file_path: str     = file_path
+        self.sample_rate: int   = sample_rate
+        self.channels: int      = channels
+        self.subtype: str       = subtype
+        self.begin: int         = begin
+        self.end: int           = end
+        self.gains: List[float] = list(gains) if gains else []
+
+    @classmethod
+    def open(cls, file_path: str) -> 'AudioStream':
+        """
+        Open the whole wav file. (RIFF, RF64 or BW64)
+        """
+        with rf64.soundfile_source(file_path) as source, sf.SoundFile(source, "r") as f:
+            return AudioStream(file_path, f.samplerate, f.channels, f.subtype, 0, f.frames)
+
+    @property
+    def frames(self) -> int:
+        return self.end - self.begin
+
+    def __len__(self) -> int:
+        """
+        Length in milliseconds (Same as AudioData)
+        """
+        return round(1000 * self.frames / self.sample_rate)
+
+    def ms_to_frames(self, ms: float) -> int:
+        return int(ms * self.sample_rate / 1000)
+
+    def _apply_gains(self, samples: np.ndarray) -> np.ndarray:
+        for gain in self.gains:
+            samples = samples * gain
+        return samples
+
+    def get_frames(self, begin: int, end: int) -> np.ndarray:
+        """
+        Read the samples of frames [begin, end) in this range.
+        """
+        begin = min(max(begin, 0), self.frames)
+        end   = min(max(end, begin), self.frames)
+
+        with rf64.soundfile_source(self.file_path) as source, sf.SoundFile(source, "r") as f:
+            f.seek(self.begin + begin)
+            return self._apply_gains(read_samples(f, end - begin))
+
+    def blocks(self, block_frames: int = STREAM_BLOCK_FRAMES) -> Iterator[np.ndarray]:
+        """
+        Read all samples in blocks of `block_frames` frames.
+        """
+        with rf64.soundfile_source(self.file_path) as source, sf.SoundFile(source, "r") as f:
+            f.seek(self.begin)
+            for begin in range(0, self.frames, block_frames):
+                count = min(block_frames, self.frames - begin)
+                yield self._apply_gains(read_samples(f, count))
+
+    def peak(self) -> float:
+        result = 0.0
+        for block in self.blocks():
+            result = max(result, float(np.max(np.abs(block))))
+        return result
+
+    @property
+    def max_dBFS(self) -> float:
+        return ratio_to_dB(self.peak())
+
+    def apply_gain(self, gain_dB: float) -> 'AudioStream':
+        return self._derive(self.begin, self.end, self.gains + [dB_to_ratio(gain_dB)])
+
+    def slice_ms(self, start_ms: int, end_ms: int) -> 'AudioStream':
+        """
+        Get a sub range in milliseconds.
+        """
+        start = min(max(self.ms_to_frames(start_ms), 0), self.frames)
+        end   = min(max(self.ms_to_frames(end_ms), start), self.frames)
+        return self._derive(self.begin + start, self.begin + end, self.gains)
+
+    def _derive(self, begin: int, end: int, gains: List[float]) -> 'AudioStream':
+        return AudioStream(self.file_path, self.sample_rate, self.channels, self.subtype, begin, end, gains)
+
+    def load(self) -> AudioData:
+        """
+        Read all samples into memory. (For the effects which do not support streaming)
+        """
+        return AudioData(self.get_frames(0, self.frames), self.sample_rate, self.subtype)
+
+    def is_exact(self, bits: int) -> bool:
+        """
+        Whether all samples are exact at `bits` integer samples. See `AudioData.is_exact()`.
+        """
+        source_bits = PCM_BITS_TABLE.get(self.subtype)
+        if not self.gains and source_bits is not None and source_bits <= bits:
+            # Integer samples without gain are exact without reading
+            return True
+        return all(AudioData(block, self.sample_rate, self.subtype).is_exact(bits) for block in self.blocks())
+
+    def write(self, file_path: str, bit_depth: str = None, dither: bool = False) -> None:
+        """
+        Write to a wav file block by block. See `AudioData.write()`.
+        """
+        subtype     = output_subtype(self.subtype, bit_depth)
+        file_format = rf64.soundfile_format(self.frames, self.channels, subtype)
+
+        # Decide dither for the whole file as AudioData does (Not per block: Exact blocks would have no noise floor)
+        dither = dither and can_dither(subtype) and not self.is_exact(PCM_BITS_TABLE[subtype])
+
+        with sf.SoundFile(file_path, "w", samplerate=self.sample_rate, channels=self.channels, subtype=subtype, format=file_format) as f:
+            for block in self.blocks():
+                f.write(AudioData(block, self.sample_rate, self.subtype).encode(subtype, dither))
+
+    def __str__(self) -> str:
+        return f"file_path={self.file_path}, begin={self.begin}, end={self.end}, gains={self.gains}, channels={self.channels}, sample_rate={self.sample_rate}, subtype={self.subtype}"
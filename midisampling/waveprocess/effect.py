@@ -0,0 +1,100 @@
+from typing import Any, List
+import abc
+
+from midisampling.exportpath import RecordedAudioPath
+from midisampling.waveprocess.audiodata import AudioData
+from midisampling.waveprocess.wavpeak import WavStats
+
+class IAudioEffect(abc.ABC):
+    """
+    An effect in the post process chain.
+
+    An effect which needs a measurement over all files (e.g. normalize) does it in 2 steps before `apply()`:
+
+    1. `analyze()` for each file (the audio is processed by the preceding effects of the chain)
+    2. `finish_analysis()` once with all results of `analyze()`
+
+    The chain calls `finish_file_analysis()` and `apply_file()` with the files.
+    Effects which depend on the file (e.g. gain per group of files) override them, the others implement `finish_analysis()` and `apply()`.
+    """
+
+    def __init__(self, name: str, params: dict) -> None:
+        self.name: str    = name
+        self.params: dict = params
+
+    def supports_streaming(self) -> bool:
+        """
+        Whether `analyze()` and `apply()` accept an AudioStream (read block by block) as well as AudioData.
+        The chain streams files only if all effects support it.
+        """
+        return False
+
+    def requires_analysis(self) -> bool:
+        """
+        Whether the effect needs the analysis pass over all files before `apply()`.
+        """
+        return False
+
+    def analyze(self, audio: AudioData) -> Any:
+        """
+        Measure a file. The result is passed to `finish_analysis()`.
+        """
+        return None
+
+    def analyze_stats(self, stats: WavStats) -> Any:
+        """
+        Measure a file from the statistics of its samples without decoding it, if possible.
+        (Called instead of `analyze()` for the first effect of the chain. Statistics may come from the analysis cache)
+
+        Returns
+        -------
+            The same result as `analyze()`. None if not supported (`analyze()` is called instead).
+        """
+        return None
+
+    def finish_analysis(self, results: List[Any]) -> None:
+        """
+        Aggregate the results of `analyze()` of all files.
+        """
+        pass
+
+    def finish_file_analysis(self, results: List[Any], files: List[RecordedAudioPath]) -> None:
+        """
+        Aggregate the results of `analyze()` of all files with the files. (`results[i]` is the result of `files[i]`)
+        Calls `finish_analysis()` by default.
+        """
+        self.finish_analysis(results)
+
+    def analysis_state(self) -> Any:
+        """
+        Result of the analysis which affects the output (JSON serializable). Used to detect outdated outputs.
+        """
+        return None
+
+    def file_analysis_state(self, file: RecordedAudioPath) -> Any:
+        """
+        Result of the analysis which affects the output of the file. (See `analysis_state()`)
+        Returns `analysis_state()` by default.
+        """
+        return self.analysis_state()
+
+    @abc.abstractmethod
+    def apply(self, audio: AudioData) -> AudioData:
+        """
+        Apply the effect to the audio.
+
+        Returns
+        -------
+            AudioData: Processed audio
+        """
+        pass
+
+    def apply_file(self, audio: AudioData, file: RecordedAudioPath) -> AudioData:
+        """
+        Apply the effect to the audio of the file. (file: Source of the audio, None if not known)
+        Calls `apply()` by default.
+        """
+        return self.apply(audio)
+
+    def __str__(self) -> str:
+        return f"name={self.name}, params={self.params}"
@@ -0,0 +1,377 @@
+from typing import Any, Callable, List, Tuple, Union
+import os
+import json
+import hashlib
+from concurrent.futures import Executor, ProcessPoolExecutor
+
+from logging import getLogger
+
+from midisampling.exportpath import RecordedAudioPath, ProcessedAudioPath
+from midisampling.fileutil import temp_path_for
+from midisampling.appconfig.audioprocess import AudioProcessConfig
+
+from midisampling.waveprocess.audiodata import AudioData
+from midisampling.waveprocess.audiostream import AudioStream
+from midisampling.waveprocess.effect import IAudioEffect
+from midisampling.waveprocess.formatconvert import FormatEffect
+from midisampling.waveprocess.wavchunkkeeper import WavChunkKeeper
+from midisampling.waveprocess.wavpeak import WavStats
+from midisampling.waveprocess.analysiscache import AnalysisCache
+import midisampling.waveprocess.wavpeak as wavpeak
+
+logger = getLogger(__name__)
+
+class AudioProcessError(Exception):
+    """
+    Raised after all files are processed if any of the files failed.
+    """
+    def __init__(self, failures: List[Tuple[str, Exception]]) -> None:
+        """
+        Parameters
+        ----------
+            failures:
+                List of (file path, error)
+        """
+        self.failures: List[Tuple[str, Exception]] = failures
+
+        lines = [f"{len(failures)} file(s) failed to process:"]
+        for file_path, error in failures:
+            lines.append(f"  {file_path}: {type(error).__name__}: {error}")
+
+        super().__init__("\n".join(lines))
+
+def resolve_jobs(jobs: int) -> int:
+    """
+    Get the number of worker processes. (0 or None: Number of CPUs)
+    """
+    if not jobs:
+        return os.cpu_count() or 1
+    return jobs
+
+#---------------------------------------------------------------------------
+# Per file tasks (Module level functions to run in worker processes)
+#---------------------------------------------------------------------------
+def _analyze_task(chain: 'AudioEffectChain', index: int, file: RecordedAudioPath) -> Any:
+    audio = chain.read(file.path())
+    audio = chain.apply(audio, index, file)
+    return chain.effects[index].analyze(audio)
+
+def _scan_stats_task(input_path: str) -> WavStats:
+    return wavpeak.scan_stats(input_path)
+
+def _process_task(chain: 'AudioEffectChain', file: RecordedAudioPath, output_path: str, bit_depth: str, dither: bool, keep_chunk_names: List[str]) -> None:
+    chain.process_file(
+        input_path=file.path(),
+        output_path=output_path,
+        bit_depth=bit_depth,
+        dither=dither,
+        keep_chunk_names=keep_chunk_names,
+        file=file
+    )
+
+def _run_tasks(executor: Executor, task: Callable[..., Any], args_list: List[tuple], labels: List[str], done_message: str, on_done: Callable[[int], None] = None) -> List[Any]:
+    """
+    Run the task for each args and return the results in the input order.
+    Results are logged in the input order regardless of the completion order.
+    Errors are collected and raised as an AudioProcessError after all tasks are done.
+    `on_done` is called with the index of each succeeded task in this process.
+    """
+    results: List[Any]                      = []
+    failures: List[Tuple[str, Exception]]   = []
+
+    if executor is None:
+        # Run in this process
+        for index, (args, label) in enumerate(zip(args_list, labels)):
+            try:
+                results.append(task(*args))
+                logger.info(f"{done_message}: {label}")
+                if on_done:
+                    on_done(index)
+            except Exception as e:
+                logger.error(f"Failed: {label}: {e}")
+                failures.append((label, e))
+    else:
+        futures = [executor.submit(task, *args) for args in args_list]
+        for index, (future, label) in enumerate(zip(futures, labels)):
+            try:
+                results.append(future.result())
+                logger.info(f"{done_message}: {label}")
+                if on_done:
+                    on_done(index)
+            except Exception as e:
+                logger.error(f"Failed: {label}: {e}")
+                failures.append((label, e))
+
+    if len(failures) > 0:
+        raise AudioProcessError(failures)
+
+    return results
+
+class AudioEffectChain:
+    """
+    Fused effect chain.
+    Each file is read once, processed by all effects and written once.
+    If all effects support streaming, files are read and written block by block (AudioStream), otherwise loaded into memory (AudioData).
+
+    Effects which need a measurement over all files are analyzed in separate read-only passes before processing.
+    (In the pass, the audio is processed by the preceding effects of the chain)
+
+    Files are processed in parallel by `jobs` worker processes.
+
+    Examples
+    --------
+
+    ```python
+    chain = AudioEffectChain.from_config(config, [NormalizeEffect({"target_dBFS": -1.0}), TrimEffect({...})])
+    chain.process(config, file_list)
+    ```
+    """
+
+    def __init__(self, effects: List[IAudioEffect]) -> None:
+        self.effects: List[IAudioEffect] = effects
+
+    @classmethod
+    def from_config(cls, config: AudioProcessConfig, effects: List[IAudioEffect]) -> 'AudioEffectChain':
+        """
+        Create a chain of the effects. The sample rate / channels conversion to `config.format` is prepended if specified.
+        """
+        audio_format = config.format if config else None
+
+        if audio_format and (audio_format.sample_rate or audio_format.channels):
+            effects = [FormatEffect(sample_rate=audio_format.sample_rate, channels=audio_format.channels)] + effects
+
+        return AudioEffectChain(effects)
+
+    @classmethod
+    def bit_depth(cls, config: AudioProcessConfig) -> str:
+        """
+        Get the output bit depth from the config. (None: same as the source)
+        """
+        if not config or not config.format:
+            return None
+        return config.format.bit_depth
+
+    @classmethod
+    def dither(cls, config: AudioProcessConfig) -> bool:
+        """
+        Get whether to dither the output from the config.
+        """
+        if not config or not config.format:
+            return False
+        return config.format.dither
+
+    def hash(self, bit_depth: str = None, keep_chunk_names: List[str] = None, dither: bool = False, file: RecordedAudioPath = None) -> str:
+        """
+        Hash of the effects, their analysis results and the output format.
+        Call after the analysis.
+
+        Parameters
+        ----------
+            file:
+                Include only the analysis results which affect this file. (e.g. Gain of its group)
+                None: All analysis results
+        """
+        description = {
+            "effects": [
+                {"name": x.name, "params": x.params, "state": x.analysis_state() if file is None else x.file_analysis_state(file)}
+                for x in self.effects
+            ],
+            "bit_depth": bit_depth,
+            "dither": dither,
+            "keep_chunk_names": keep_chunk_names,
+        }
+        return hashlib.sha256(json.dumps(description, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def supports_streaming(self) -> bool:
+        """
+        Whether all effects support AudioStream. (Memory does not depend on the length of the files)
+        """
+        return all(x.supports_streaming() for x in self.effects)
+
+    def read(self, input_path: str) -> Union[AudioData, AudioStream]:
+        """
+        Open the input file as an AudioStream if all effects support it, otherwise read it into memory.
+        """
+        if self.supports_streaming():
+            return AudioStream.open(input_path)
+        return AudioData.read(input_path)
+
+    def apply(self, audio: AudioData, count: int = None, file: RecordedAudioPath = None) -> AudioData:
+        """
+        Apply the first `count` effects (all effects if None) to the audio of the file.
+        """
+        for effect in self.effects[:count]:
+            audio = effect.apply_file(audio, file)
+        return audio
+
+    def scan_stats(self, file_list: List[ProcessedAudioPath], executor: Executor = None, cache: AnalysisCache = None) -> List[WavStats]:
+        """
+        Get the statistics of the input files. Files not in the cache are scanned.
+        (None for the files which are not supported by the scanner)
+        """
+        stats_list: List[WavStats] = [None] * len(file_list)
+        scan_indices: List[int]    = []
+
+        for i, file in enumerate(file_list):
+            if cache:
+                stats_list[i] = cache.get(file.recorded_audio_path.path())
+            if stats_list[i] is None:
+                scan_indices.append(i)
+
+        if len(scan_indices) < len(file_list):
+            logger.info(f"Use cached statistics of {len(file_list) - len(scan_indices)} file(s)")
+
+        results = _run_tasks(
+            executor=executor,
+            task=_scan_stats_task,
+            args_list=[(file_list[i].recorded_audio_path.path(),) for i in scan_indices],
+            labels=[file_list[i].file_path for i in scan_indices],
+            done_message="Scanned"
+        )
+
+        for i, stats in zip(scan_indices, results):
+            stats_list[i] = stats
+            if cache and stats is not None:
+                cache.put(file_list[i].recorded_audio_path.path(), stats)
+
+        return stats_list
+
+    def analyze(self, file_list: List[ProcessedAudioPath], executor: Executor = None, cache: AnalysisCache = None) -> None:
+        """
+        Run the analysis pass of the effects which require it.
+        """
+        for index, effect in enumerate(self.effects):
+            if not effect.requires_analysis():
+                continue
+
+            logger.info(f"Analyze for {effect.name}")
+
+            results: List[Any] = [None] * len(file_list)
+
+            # Fast path: No preceding effects, the file can be measured from the statistics
+            if index == 0:
+                stats_list = self.scan_stats(file_list, executor, cache)
+                for i, stats in enumerate(stats_list):
+                    if stats is not None:
+                        results[i] = effect.analyze_stats(stats)
+
+            # Decode the other files
+            decode_indices = [i for i, x in enumerate(results) if x is None]
+            decoded = _run_tasks(
+                executor=executor,
+                task=_analyze_task,
+                args_list=[(self, index, file_list[i].recorded_audio_path) for i in decode_indices],
+                labels=[file_list[i].file_path for i in decode_indices],
+                done_message="Analyzed"
+            )
+
+            for i, result in zip(decode_indices, decoded):
+                results[i] = result
+
+            effect.finish_file_analysis(results, [x.recorded_audio_path for x in file_list])
+
+    def process_file(self, input_path: str, output_path: str, bit_depth: str = None, keep_chunk_names: List[str] = None, dither: bool = False, file: RecordedAudioPath = None) -> None:
+        """
+        Load the file, apply all effects and write it.
+        The output is written to a temporary file next to `output_path` and moved to `output_path` atomically when completed.
+        (`output_path` can be the same as `input_path`)
+
+        Parameters
+        ----------
+            keep_chunk_names:
+                Restore these chunks of the input file which are removed by the process. ([]: All chunks, None: Do not restore)
+            file:
+                Recorded file of `input_path`. (For the effects which depend on the file, e.g. normalize per group)
+        """
+        temp_path = temp_path_for(output_path)
+
+        keeper: WavChunkKeeper = None
+        if keep_chunk_names is not None:
+            keeper = WavChunkKeeper(
+                source_path=input_path,
+                target_path=temp_path,
+                keep_chunk_names=keep_chunk_names
+            )
+
+        try:
+            audio = self.read(input_path)
+            audio = self.apply(audio, file=file)
+            audio.write(temp_path, bit_depth=bit_depth, dither=dither)
+
+            if keeper:
+                keeper.restore()
+
+            os.replace(temp_path, output_path)
+        except:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def process(self, config: AudioProcessConfig, file_list: List[ProcessedAudioPath], jobs: int = 1, keep_chunk_names: List[str] = None, cache: AnalysisCache = None, skip: Callable[[ProcessedAudioPath, str], bool] = None, on_processed: Callable[[ProcessedAudioPath, str], None] = None) -> List[ProcessedAudioPath]:
+        """
+        Process the recorded files and write them to the output path directly.
+
+        Parameters
+        ----------
+            jobs:
+                Number of worker processes. (1: Process in this process, 0: Number of CPUs)
+            keep_chunk_names:
+                See `process_file()`
+            cache:
+                Analysis cache of the input files. (Updated with new statistics)
+            skip:
+                Called with each file and the hash of the chain for the file (`hash()` with the file) after the analysis.
+                Files returning True are not processed. (e.g. Up to date outputs)
+            on_processed:
+                Called with each file and the hash of the chain for the file when the output is written.
+                (Also called for the succeeded files when some files failed)
+
+        Returns
+        -------
+            List[ProcessedAudioPath]: Processed files
+        """
+        bit_depth = AudioEffectChain.bit_depth(config)
+        dither    = AudioEffectChain.dither(config)
+        jobs      = resolve_jobs(jobs)
+
+        for file in file_list:
+            file.makedirs()
+
+        executor: Executor = None
+        if jobs > 1 and len(file_list) > 1:
+            logger.info(f"Process with {jobs} worker processes")
+            executor = ProcessPoolExecutor(max_workers=jobs)
+
+        try:
+            # Analysis is always done for all files (e.g. Normalize gain depends on all files)
+            self.analyze(file_list, executor, cache)
+
+            # Hash includes the analysis results which affect each file (e.g. Only the gain of its group)
+            file_hashes     = [self.hash(bit_depth, keep_chunk_names, dither, x.recorded_audio_path) for x in file_list]
+            process_indices = list(range(len(file_list)))
+            if skip:
+                process_indices = [i for i in process_indices if not skip(file_list[i], file_hashes[i])]
+                if len(process_indices) < len(file_list):
+                    logger.info(f"Skip {len(file_list) - len(process_indices)} up to date file(s)")
+
+            process_list = [file_list[i] for i in process_indices]
+
+            _run_tasks(
+                executor=executor,
+                task=_process_task,
+                args_list=[
+                    (self, x.recorded_audio_path, x.path(), bit_depth, dither, keep_chunk_names)
+                    for x in process_list
+                ],
+                labels=[x.file_path for x in process_list],
+                done_message="Processed",
+                on_done=(lambda i: on_processed(process_list[i], file_hashes[process_indices[i]])) if on_processed else None
+            )
+        finally:
+            if executor:
+                executor.shutdown()
+
+        return process_list
+
+    def __str__(self) -> str:
+        return " -> ".join([effect.name for effect in self.effects])
@@ -0,0 +1,79 @@
+from typing import override
+import abc
+import re
+import pathlib
+
+from midisampling.exportpath import RecordedAudioPath
+import midisampling.dynamic_format as dynamic_format
+
+PARAM_KEY_TEMPLATE = "template"
+"""
+`group_by` parameter key of the template over the path placeholders.
+"""
+
+PARAM_KEY_REGEX = "regex"
+"""
+`group_by` parameter key of the regular expression over the file path.
+"""
+
+class IFileGrouping(abc.ABC):
+    """
+    Map each file to the key of its group. Files with the same key belong to the same group.
+    """
+
+    @abc.abstractmethod
+    def key(self, file: RecordedAudioPath) -> str:
+        pass
+
+class TemplateGrouping(IFileGrouping):
+    """
+    Group by a template over the path placeholders. (e.g. `{pc_msb}-{pc_lsb}-{pc}` per program, `{velocity}` per velocity layer)
+    Available for the files recorded in the session only. (The values of the placeholders are not known for the other files)
+    """
+    def __init__(self, template: str) -> None:
+        self.template: str = template
+
+    @override
+    def key(self, file: RecordedAudioPath) -> str:
+        if file.placeholders is None:
+            raise ValueError(f"Path placeholders are not available to group by template (Use regex instead): {file.file_path}")
+
+        try:
+            return dynamic_format.format(format_string=self.template, data=file.placeholders)
+        except (KeyError, IndexError) as e:
+            raise ValueError(f"Unknown placeholder in group_by template: {self.template}") from e
+
+    def __str__(self) -> str:
+        return f"template={self.template}"
+
+class RegexGrouping(IFileGrouping):
+    """
+    Group by a regular expression searched in the file path (relative, `/` separated).
+    The key is the captured groups if any, otherwise the matched string. Files which do not match form a group with the key `""`.
+    """
+    def __init__(self, pattern: str) -> None:
+        self.pattern: re.Pattern = re.compile(pattern)
+
+    @override
+    def key(self, file: RecordedAudioPath) -> str:
+        match = self.pattern.search(pathlib.PurePath(file.file_path).as_posix())
+        if match is None:
+            return ""
+        if self.pattern.groups == 0:
+            return match.group(0)
+        return "/".join(x or "" for x in match.groups())
+
+    def __str__(self) -> str:
+        return f"regex={self.pattern.pattern}"
+
+def create_grouping(group_by: dict) -> IFileGrouping:
+    """
+    Create the grouping from the `group_by` parameter. (None: All files in one group)
+    """
+    if group_by is None:
+        return None
+    if PARAM_KEY_TEMPLATE in group_by:
+        return TemplateGrouping(group_by[PARAM_KEY_TEMPLATE])
+    if PARAM_KEY_REGEX in group_by:
+        return RegexGrouping(group_by[PARAM_KEY_REGEX])
+    raise ValueError(f"group_by requires {PARAM_KEY_TEMPLATE} or {PARAM_KEY_REGEX}: {group_by}")
@@ -0,0 +1,63 @@
+from typing import override
+
+from logging import getLogger
+
+from midisampling.waveprocess.audiodata import AudioData
+from midisampling.waveprocess.audiostream import AudioStream
+from midisampling.waveprocess.effect import IAudioEffect
+from midisampling.waveprocess.resample import resample, convert_channels
+
+logger = getLogger(__name__)
+
+class FormatEffect(IAudioEffect):
+    """
+    Convert the sample rate and the number of channels to the output format.
+    Placed at the beginning of the chain, so the following effects (e.g. normalize) process the delivered format.
+    """
+    def __init__(self, sample_rate: int = None, channels: int = None) -> None:
+        """
+        Parameters
+        ----------
+            sample_rate:
+                Output sample rate. (None: Same as the source)
+            channels:
+                Output number of channels. (None: Same as the source)
+        """
+        super().__init__("format", {"sample_rate": sample_rate, "channels": channels})
+        self.sample_rate: int = sample_rate
+        self.channels: int    = channels
+
+    @override
+    def supports_streaming(self) -> bool:
+        # Streamed files are loaded into memory only if they are converted
+        return True
+
+    def _converts(self, audio: AudioData) -> bool:
+        return (
+            (self.sample_rate and self.sample_rate != audio.sample_rate)
+            or (self.channels and self.channels != audio.channels)
+        )
+
+    @override
+    def apply(self, audio: AudioData) -> AudioData:
+        if not self._converts(audio):
+            return audio
+
+        if isinstance(audio, AudioStream):
+            audio = audio.load()
+
+        samples     = audio.samples
+        sample_rate = audio.sample_rate
+
+        # Down-mix before resampling and up-mix after resampling (Less channels to resample)
+        if self.channels and self.channels < audio.channels:
+            samples = convert_channels(samples, self.channels)
+
+        if self.sample_rate and self.sample_rate != sample_rate:
+            samples     = resample(samples, sample_rate, self.sample_rate)
+            sample_rate = self.sample_rate
+
+        if self.channels and self.channels > samples.shape[1]:
+            samples = convert_channels(samples, self.channels)
+
+        return AudioData(samples, sample_rate, audio.subtype)
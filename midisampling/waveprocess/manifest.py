@@ -0,0 +1,110 @@
+from typing import Dict
+import os
+import json
+
+from logging import getLogger
+
+from midisampling.exportpath import ProcessedAudioPath
+from midisampling.waveprocess.analysiscache import FileFingerprint, save_jsonl
+
+logger = getLogger(__name__)
+
+MANIFEST_FILE_NAME = ".midisampling-process-manifest.jsonl"
+"""
+File name of the process manifest in the processed output directory.
+"""
+
+class ProcessManifest:
+    """
+    Record of the processed outputs in JSON Lines format. Used to reprocess only outputs which are out of date.
+
+    An output is up to date while:
+
+    - The input file is unchanged (path + size + modification time)
+    - The hash of the effect chain (including the analysis results like the normalize gain) and format is unchanged
+    - The output file is unchanged since it was written
+
+    Examples
+    --------
+
+    ```python
+    manifest = ProcessManifest(os.path.join(output_dir, MANIFEST_FILE_NAME))
+    manifest.load()
+
+    if not manifest.is_up_to_date(file, chain_hash):
+        # Process, write the output, then
+        manifest.update(file, chain_hash)
+
+    manifest.save()
+    ```
+    """
+
+    def __init__(self, manifest_path: str) -> None:
+        self.manifest_path: str       = manifest_path
+        self.entries: Dict[str, dict] = {}
+        self.modified: bool           = False
+
+    def load(self) -> None:
+        """
+        Load entries from the manifest file. Does nothing if the file does not exist.
+        """
+        self.entries  = {}
+        self.modified = False
+
+        if not os.path.exists(self.manifest_path):
+            return
+
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, start=1):
+                line = line.strip()
+                if len(line) == 0:
+                    continue
+                try:
+                    entry = json.loads(line)
+                    self.entries[entry["file_path"]] = entry
+                except (json.JSONDecodeError, KeyError):
+                    logger.warning(f"Ignore broken manifest entry: {self.manifest_path}:{line_no}")
+
+        logger.info(f"Loaded process manifest: {len(self.entries)} file(s) in {self.manifest_path}")
+
+    def is_up_to_date(self, file: ProcessedAudioPath, chain_hash: str) -> bool:
+        entry = self.entries.get(file.file_path)
+        if entry is None:
+            return False
+        if entry["chain_hash"] != chain_hash:
+            return False
+
+        input_path  = file.recorded_audio_path.path()
+        output_path = file.path()
+
+        if not os.path.exists(input_path) or not os.path.exists(output_path):
+            return False
+
+        return (
+            FileFingerprint.from_dict(entry["input"]) == FileFingerprint.from_path(input_path)
+            and FileFingerprint.from_dict(entry["output"]) == FileFingerprint.from_path(output_path)
+        )
+
+    def update(self, file: ProcessedAudioPath, chain_hash: str) -> None:
+        """
+        Record the output. The output file must already be written.
+        """
+        self.entries[file.file_path] = {
+            "file_path": file.file_path,
+            "chain_hash": chain_hash,
+            "input": FileFingerprint.from_path(file.recorded_audio_path.path()).to_dict(),
+            "output": FileFingerprint.from_path(file.path()).to_dict(),
+        }
+        self.modified = True
+
+    def save(self) -> None:
+        """
+        Write all entries to the manifest file. (Replaced atomically)
+        """
+        if not self.modified:
+            return
+
+        save_jsonl(self.manifest_path, self.entries.values())
+
+        self.modified = False
+        logger.debug(f"Saved process manifest: {len(self.entries)} file(s) in {self.manifest_path}")
@@ -1,14 +1,18 @@
-from typing import List
+from typing import Dict, List, Union, override
+import math
 
-import os
-import sys
 from logging import getLogger
-from pydub import AudioSegment
+
+import numpy as np
 
 from midisampling.exportpath import RecordedAudioPath, ProcessedAudioPath
 from midisampling.appconfig.audioprocess import AudioProcessConfig
 
-import midisampling.waveprocess.pydubutil as pydubutil
+from midisampling.waveprocess.audiodata import AudioData, ratio_to_dB
+from midisampling.waveprocess.wavpeak import WavStats
+from midisampling.waveprocess.effect import IAudioEffect
+from midisampling.waveprocess.effectchain import AudioEffectChain
+from midisampling.waveprocess.filegroup import IFileGrouping, create_grouping
 
 logger = getLogger(__name__)
 
@@ -17,11 +21,128 @@ PARAM_KEY_TARGET_PEAK_DBFS = "target_dBFS"
 Effect parameter key for target_dBFS.
 """
 
-def __get_target_peak_dBFS(effect_parameters: dict) -> float:
+PARAM_KEY_GROUP_BY = "group_by"
+"""
+Effect parameter key for group_by.
+"""
+
+def _get_target_peak_dBFS(effect_parameters: dict) -> float:
     if PARAM_KEY_TARGET_PEAK_DBFS in effect_parameters:
         return float(effect_parameters[PARAM_KEY_TARGET_PEAK_DBFS])
     return -1.0
 
+class NormalizeEffect(IAudioEffect):
+    """
+    Normalize with respect to the highest peak of all processed audio files.
+    The same gain is applied to every file.
+
+    With `group_by`, each group of files (e.g. per program or per velocity layer) is normalized with respect to its own highest peak.
+    """
+    def __init__(self, effect_parameters: dict) -> None:
+        super().__init__("normalize", effect_parameters)
+        self.target_dBFS: float               = _get_target_peak_dBFS(effect_parameters)
+        self.grouping: IFileGrouping          = create_grouping(effect_parameters.get(PARAM_KEY_GROUP_BY))
+        self.gain_dB: float                   = None
+        self.group_gains_dB: Dict[str, float] = None
+
+    def _gain_for(self, max_peak_dBFS: float) -> float:
+        if math.isinf(max_peak_dBFS):
+            # Silent: Gain cannot be determined
+            return 0.0
+        return self.target_dBFS - max_peak_dBFS
+
+    @override
+    def supports_streaming(self) -> bool:
+        # Gain is applied per block
+        return True
+
+    @override
+    def requires_analysis(self) -> bool:
+        return True
+
+    @override
+    def analyze(self, audio: AudioData) -> float:
+        return audio.max_dBFS
+
+    @override
+    def analyze_stats(self, stats: WavStats) -> float:
+        return ratio_to_dB(stats.peak)
+
+    @override
+    def finish_analysis(self, results: List[float]) -> None:
+        if len(results) == 0:
+            raise ValueError("No audio to analyze")
+
+        max_peak_dBFS = max(results)
+        self.gain_dB  = self._gain_for(max_peak_dBFS)
+
+        logger.info(f"Max Peak dBFS={max_peak_dBFS:.3f} dBFS")
+        logger.info(f"Target dBFS={self.target_dBFS:.3f} dBFS")
+        logger.info(f"Normalize gain={self.gain_dB:.3f} dBFS")
+
+    @override
+    def finish_file_analysis(self, results: List[float], files: List[RecordedAudioPath]) -> None:
+        if self.grouping is None:
+            self.finish_analysis(results)
+            return
+
+        if len(results) == 0:
+            raise ValueError("No audio to analyze")
+
+        # Max peak of every group at once
+        keys                    = [self.grouping.key(x) for x in files]
+        group_keys, group_index = np.unique(keys, return_inverse=True)
+        max_peaks_dBFS          = np.full(len(group_keys), -np.inf)
+        np.maximum.at(max_peaks_dBFS, group_index, np.asarray(results, dtype=np.float64))
+
+        self.group_gains_dB = {}
+
+        logger.info(f"Target dBFS={self.target_dBFS:.3f} dBFS")
+        logger.info(f"Group by {self.grouping}: {len(group_keys)} group(s)")
+
+        for key, max_peak_dBFS in zip(group_keys.tolist(), max_peaks_dBFS.tolist()):
+            self.group_gains_dB[key] = self._gain_for(max_peak_dBFS)
+            logger.info(f"Group \"{key}\": Max Peak dBFS={max_peak_dBFS:.3f} dBFS, Normalize gain={self.group_gains_dB[key]:.3f} dBFS")
+
+    @override
+    def analysis_state(self) -> Union[float, Dict[str, float]]:
+        if self.grouping is not None:
+            return self.group_gains_dB
+        return self.gain_dB
+
+    @override
+    def file_analysis_state(self, file: RecordedAudioPath) -> float:
+        # Only the gain of the group of the file (Outputs of the other groups are kept when it changes)
+        if self.grouping is not None:
+            return self._group_gain_dB(file)
+        return self.gain_dB
+
+    def _group_gain_dB(self, file: RecordedAudioPath) -> float:
+        if self.group_gains_dB is None:
+            raise RuntimeError("finish_file_analysis() is not called")
+        if file is None:
+            raise ValueError("File is required to normalize with group_by")
+
+        key = self.grouping.key(file)
+        if key not in self.group_gains_dB:
+            raise ValueError(f"File is not in the analyzed groups: {file.file_path}")
+
+        return self.group_gains_dB[key]
+
+    @override
+    def apply(self, audio: AudioData) -> AudioData:
+        if self.grouping is not None:
+            raise RuntimeError("Gain depends on the file with group_by: apply_file() is required")
+        if self.gain_dB is None:
+            raise RuntimeError("finish_analysis() is not called")
+        return audio.apply_gain(self.gain_dB)
+
+    @override
+    def apply_file(self, audio: AudioData, file: RecordedAudioPath) -> AudioData:
+        if self.grouping is None:
+            return self.apply(audio)
+        return audio.apply_gain(self._group_gain_dB(file))
+
 def normalize_from_list(config: AudioProcessConfig, file_list: List[ProcessedAudioPath], effect_parameters: dict):
     """
     Normalize with respect to the highest peak of the audio file(s) in the input directory.
@@ -41,51 +162,8 @@ def normalize_from_list(config: AudioProcessConfig, file_list: List[ProcessedAud
     if len(file_list) == 0:
         raise ValueError("file_list is empty")
 
-    max_peak_dBFS = -sys.float_info.max
-    audio_segments = []
-    export_parameters = []
-
-    target_dBFS = __get_target_peak_dBFS(effect_parameters)
-
-    pydubutil.to_export_parameters_from_config(config, export_parameters)
-    if len(export_parameters) == 0:
-        export_parameters = None
-
-    # 全てのファイルの最大ピークレベルを探す
-    for file in file_list:
-        input_filepath  = file.recorded_audio_path.path()
-        output_filepath = file.path()
-        audio           = AudioSegment.from_wav(input_filepath)
-        peak_dBFS = audio.max_dBFS
-        audio = None
-
-        logger.debug(f"wip - {os.path.basename(input_filepath)}: Peak dBFS={peak_dBFS:.3f}")
-        if peak_dBFS > max_peak_dBFS:
-            max_peak_dBFS = peak_dBFS
-            logger.debug(f"wip - Max Peak dBFS Updated={max_peak_dBFS:.3f}")
-
-        audio_segments.append((audio, output_filepath))
-
-    change_in_dBFS = target_dBFS - max_peak_dBFS
-
-    # 各ファイルに対して同じゲインを適用
-    for file in file_list:
-        input_filepath  = file.working_path()
-        output_filepath = file.working_path()
-        audio           = AudioSegment.from_wav(input_filepath)
-
-        file.makeworkingdirs()
-        normalized_audio = audio.apply_gain(change_in_dBFS)
-        normalized_audio.export(output_filepath, format="wav", parameters=export_parameters)
-
-        audio = None
-        normalized_audio = None
-
-        logger.info(f"Normalized: file={file.file_path}")
-
-    logger.info(f"Max Peak dBFS={max_peak_dBFS:.3f} dBFS")
-    logger.info(f"Target dBFS={target_dBFS:.3f} dBFS")
-    logger.info(f"Normalize gain={change_in_dBFS:.3f} dBFS")
+    chain = AudioEffectChain.from_config(config, [NormalizeEffect(effect_parameters)])
+    chain.process(config=config, file_list=file_list, jobs=config.jobs)
 
 def normalize_from_directory(config: AudioProcessConfig, input_directory: str, output_directory: str, effect_parameters: dict, overwrite: bool = False):
     """
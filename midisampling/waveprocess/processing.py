@@ -1,23 +1,19 @@
-from typing import List, Dict
+from typing import List
 import os
 import sys
-import json
-import jsonschema
-import pathlib
-import tempfile
 from logging import getLogger
 import argparse
 import traceback
 
-from midisampling.appconfig.audioprocess import AudioProcessConfig
+from midisampling.appconfig.audioprocess import AudioProcessConfig, AudioProcessInfo
 from midisampling.exportpath import RecordedAudioPath, ProcessedAudioPath
 
-from midisampling.waveprocess.normalize import normalize_from_list as normalize
-from midisampling.waveprocess.trim import trim_from_list as trim
+from midisampling.waveprocess.effect import IAudioEffect
+from midisampling.waveprocess.effectchain import AudioEffectChain
+from midisampling.waveprocess.analysiscache import AnalysisCache, ANALYSIS_CACHE_FILE_NAME
+from midisampling.waveprocess.manifest import ProcessManifest, MANIFEST_FILE_NAME
+from midisampling.waveprocess.registry import registry
 
-from midisampling.waveprocess.wavchunkkeeper import WavChunkKeeper
-
-THIS_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
 logger = getLogger(__name__)
 
@@ -35,111 +31,109 @@ def process(config: AudioProcessConfig, recorded_files: List[RecordedAudioPath],
         logger.info("Effect list is empty. Skip process.")
         return
 
-    with tempfile.TemporaryDirectory() as working_dir:
-        logger.info("Build processed audio files path list")
-        logger.debug(f"Working directory: {working_dir}")
-
-        process_files: List[ProcessedAudioPath] = []
-        wav_chunk_keepers: List[WavChunkKeeper] = []
-
-        for x in recorded_files:
-            # Configure the export path information
-            export_path = ProcessedAudioPath(
-                recorded_audio_path=x,
-                output_dir=output_dir,
-                working_dir=working_dir,
-                overwrite=True # Overwrite via effect chain
-            )
-            process_files.append(export_path)
-
-            # Keep the original wav chunks
-            keeper = WavChunkKeeper(
-                source_path=x.path(),
-                target_path=export_path.working_path(),
-                keep_chunk_names=config.keep_wav_chunks
-            )
-            wav_chunk_keepers.append(keeper)
-
-            logger.debug(f"Process export path: {export_path}")
-
-        # Copy recorded files to working directory to process
-        logger.info("Copy recorded files to working directory")
-        for x in recorded_files:
-            logger.info(f"{x.file_path}")
-            x.copy_to(working_dir)
-
-        # Procssing
-        logger.info("Processing...")
-        _process_impl(
-            config=config,
-            process_files=process_files
+    logger.info("Build processed audio files path list")
+
+    process_files: List[ProcessedAudioPath] = []
+
+    for x in recorded_files:
+        # Configure the export path information
+        export_path = ProcessedAudioPath(
+            recorded_audio_path=x,
+            output_dir=output_dir,
+            working_dir=output_dir,
+            overwrite=True # Overwrite via effect chain
         )
+        process_files.append(export_path)
+
+        logger.debug(f"Process export path: {export_path}")
+
+    # Procssing
+    # (Recorded files are read directly, processed files are written to output directory via temporary files)
+    # Original wav chunks removed by the process are restored per file
+    logger.info("Processing...")
 
-        # Restore original wav chunks
-        logger.info("Restore original wav chunks which removed by the process")
-        for x in wav_chunk_keepers:
-            logger.debug(f"Restore wav chunks: {x.source_path}")
-            x.restore()
+    # Statistics of the recorded files are cached across runs
+    cache = AnalysisCache(os.path.join(output_dir, ANALYSIS_CACHE_FILE_NAME))
+    cache.load()
 
-        # Finally, copy processed files in working directory to output directory
-        logger.info(f"Copy processed files to output directory ({output_dir})")
-        for x in process_files:
-            x.copy_working_to(output_dir)
+    # Only outputs which are out of date are processed
+    manifest = ProcessManifest(os.path.join(output_dir, MANIFEST_FILE_NAME))
+    manifest.load()
 
-def _process_impl(config: AudioProcessConfig, process_files: List[ProcessedAudioPath]) -> None:
+    try:
+        _process_impl(
+            config=config,
+            process_files=process_files,
+            cache=cache,
+            manifest=manifest
+        )
+    finally:
+        cache.save()
+        manifest.save()
+
+SAMPLE_POSITION_CHUNK_NAMES = ["smpl", "cue "]
+"""
+Chunks which have positions in sample frames. (Not valid after resampling)
+"""
+
+def _keeps_sample_position_chunks(keep_wav_chunks: List[str]) -> bool:
+    if len(keep_wav_chunks) == 0:
+        # All chunks are kept
+        return True
+    return any(x in keep_wav_chunks for x in SAMPLE_POSITION_CHUNK_NAMES)
+
+def create_effect(effect: AudioProcessInfo) -> IAudioEffect:
+    """
+    Create an effect instance from the effect configuration.
+    """
+    return registry.get(effect.name).create(effect.params)
+
+def _process_impl(config: AudioProcessConfig, process_files: List[ProcessedAudioPath], cache: AnalysisCache = None, manifest: ProcessManifest = None) -> List[ProcessedAudioPath]:
+    """
+    Returns
+    -------
+        List[ProcessedAudioPath]: Processed files
+    """
 
     divider = "-" * 80
 
-    for effect in config.effects:
-        name = effect.name
-        params = effect.params
+    chain = AudioEffectChain.from_config(config, [create_effect(x) for x in config.effects])
+
+    if config.format and config.format.sample_rate and _keeps_sample_position_chunks(config.keep_wav_chunks):
+        logger.warning(f"Sample positions in restored chunks ({', '.join(SAMPLE_POSITION_CHUNK_NAMES)}) are not converted for resampled files")
 
-        begin_message = f"Begin {name}: {params}"
-        end_message   = f"End {name} done"
+    logger.info(divider)
+    logger.info(f"Begin effect chain: {chain}")
+    for effect in chain.effects:
+        logger.info(f"  {effect}")
+    logger.info(divider)
 
-        logger.info(divider)
-        logger.info(begin_message)
-        logger.info(divider)
+    processed_files = chain.process(
+        config=config,
+        file_list=process_files,
+        jobs=config.jobs,
+        keep_chunk_names=config.keep_wav_chunks,
+        cache=cache,
+        skip=manifest.is_up_to_date if manifest else None,
+        on_processed=manifest.update if manifest else None
+    )
 
-        if name == "normalize":
-            normalize(config=config, file_list=process_files, effect_parameters=params)
-        elif name == "trim":
-            trim(config=config, file_list=process_files, effect_parameters=params)
-        else:
-            raise ValueError(f"Unknown processing name: {name}")
+    logger.info(f"End effect chain done")
 
-        logger.info(end_message)
+    return processed_files
 
 
 def validate_effect_config(config: AudioProcessConfig) -> None:
     """
     Validate individual effect configuration.
     """
-
-    def validate_parameter(parameter_json: dict, schema: dict):
-        jsonschema.validate(parameter_json, schema)
-
-    directory = pathlib.Path(THIS_SCRIPT_DIR)
-    schema_file_path_list = directory.glob(f"**/*.schema.json")
-
-    schema_table: Dict[str, dict] = {}
-    for file in schema_file_path_list:
-        with open(file, "r") as f:
-            schema = json.load(f)
-
-        title = str(schema["title"]).lower()
-        schema_table[title] =  schema
-
     for effect in config.effects:
         name   = effect.name
         params = effect.params
 
         logger.debug(f"process: name={name}, params={params}")
 
-        if name not in schema_table:
-            raise ValueError(f"Unknown process name: {name}")
-
-        validate_parameter(params, schema_table[name])
+        registry.get(name).validate(params)
 
         logger.info(f"Validation OK: {name}")
 
@@ -0,0 +1,172 @@
+from typing import Dict, List, Type
+from enum import Enum
+import os
+import json
+from importlib.metadata import entry_points
+
+from logging import getLogger
+
+import jsonschema
+from jsonschema.exceptions import best_match
+
+from midisampling.waveprocess.effect import IAudioEffect
+from midisampling.waveprocess.normalize import NormalizeEffect
+from midisampling.waveprocess.trim import TrimEffect
+
+THIS_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+logger = getLogger(__name__)
+
+ENTRY_POINT_GROUP = "midisampling.waveprocess.effects"
+"""
+Entry point group of third-party effects. Each entry point refers to an `EffectEntry`.
+"""
+
+class EffectKind(Enum):
+    PER_FILE = "per_file"
+    """
+    Each file is processed independently. (e.g. trim)
+    """
+
+    GLOBAL = "global"
+    """
+    Needs the analysis pass over all files before processing. (e.g. normalize)
+    """
+
+class EffectEntry:
+    """
+    An effect in the registry.
+    The schema of the parameters is loaded and its validator is compiled on the first validation.
+
+    Examples
+    --------
+
+    Third-party effect (`pyproject.toml` of the plugin package):
+
+    ```toml
+    [project.entry-points."midisampling.waveprocess.effects"]
+    fade = "my_effects.fade:ENTRY"
+    ```
+
+    ```python
+    # my_effects/fade.py
+    ENTRY = EffectEntry(name="fade", effect_class=FadeEffect, schema_path="fade.schema.json", kind=EffectKind.PER_FILE)
+    ```
+    """
+    def __init__(self, name: str, effect_class: Type[IAudioEffect], schema_path: str, kind: EffectKind) -> None:
+        """
+        Parameters
+        ----------
+            name:
+                Effect name in the audio process config (`effects[].name`)
+            effect_class:
+                Implementation. Constructed with the parameters dict (`effects[].params`)
+            schema_path:
+                JSON schema file of the parameters
+            kind:
+                Whether the effect processes each file independently or needs all files
+        """
+        self.name: str                        = name
+        self.effect_class: Type[IAudioEffect] = effect_class
+        self.schema_path: str                 = schema_path
+        self.kind: EffectKind                 = kind
+
+        self._validator: jsonschema.protocols.Validator = None
+
+    def validator(self) -> jsonschema.protocols.Validator:
+        """
+        Get the validator of the parameters. (Compiled once)
+        """
+        if self._validator is None:
+            with open(self.schema_path, "r", encoding="utf-8") as f:
+                schema = json.load(f)
+
+            validator_class = jsonschema.validators.validator_for(schema)
+            validator_class.check_schema(schema)
+            self._validator = validator_class(schema)
+
+            logger.debug(f"Compiled validator: {self.name} ({self.schema_path})")
+
+        return self._validator
+
+    def validate(self, params: dict) -> None:
+        """
+        Validate the parameters. Raises `jsonschema.ValidationError` if invalid.
+        """
+        error = best_match(self.validator().iter_errors(params))
+        if error is not None:
+            raise error
+
+    def create(self, params: dict) -> IAudioEffect:
+        """
+        Create an effect instance with the parameters.
+        """
+        effect = self.effect_class(params)
+
+        # Engines rely on the kind before creating instances
+        if effect.requires_analysis() != (self.kind == EffectKind.GLOBAL):
+            raise TypeError(f"Effect kind is {self.kind.value}, but requires_analysis() returns {effect.requires_analysis()}: {self.name}")
+
+        return effect
+
+    def __str__(self) -> str:
+        return f"name={self.name}, effect_class={self.effect_class.__name__}, kind={self.kind.value}, schema_path={self.schema_path}"
+
+class EffectRegistry:
+    """
+    Effects available in the audio process config.
+    Third-party effects registered to the entry point group `midisampling.waveprocess.effects` are loaded on the first lookup.
+    """
+    def __init__(self) -> None:
+        self.entries: Dict[str, EffectEntry] = {}
+        self.entry_points_loaded: bool       = False
+
+    def register(self, entry: EffectEntry) -> None:
+        if entry.name in self.entries:
+            raise ValueError(f"Effect is already registered: {entry.name}")
+
+        self.entries[entry.name] = entry
+        logger.debug(f"Registered effect: {entry}")
+
+    def load_entry_points(self) -> None:
+        """
+        Register the third-party effects. (Only once)
+        """
+        if self.entry_points_loaded:
+            return
+        self.entry_points_loaded = True
+
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+            try:
+                entry = entry_point.load()
+                if not isinstance(entry, EffectEntry):
+                    raise TypeError(f"Entry point must refer to an EffectEntry: {entry_point.value}")
+                self.register(entry)
+            except Exception as e:
+                logger.warning(f"Failed to load effect plugin {entry_point.name}: {e}")
+
+    def get(self, name: str) -> EffectEntry:
+        """
+        Get the effect entry by name. Raises ValueError if not found.
+        """
+        self.load_entry_points()
+
+        if name not in self.entries:
+            raise ValueError(f"Unknown process name: {name}")
+
+        return self.entries[name]
+
+    def names(self) -> List[str]:
+        self.load_entry_points()
+        return list(self.entries.keys())
+
+def _schema_path(schema_file_name: str) -> str:
+    return os.path.join(THIS_SCRIPT_DIR, schema_file_name)
+
+registry: EffectRegistry = EffectRegistry()
+"""
+Default effect registry with the built-in effects.
+"""
+
+registry.register(EffectEntry(name="normalize", effect_class=NormalizeEffect, schema_path=_schema_path("normalize.schema.json"), kind=EffectKind.GLOBAL))
+registry.register(EffectEntry(name="trim", effect_class=TrimEffect, schema_path=_schema_path("trim.schema.json"), kind=EffectKind.PER_FILE))
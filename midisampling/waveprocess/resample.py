@@ -0,0 +1,101 @@
+"""
+Polyphase resampler and channel conversion on NumPy arrays.
+"""
+
+import math
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+KAISER_BETA = 10.0
+"""
+Kaiser window parameter of the anti-aliasing filter. (About -100 dB of stopband attenuation)
+"""
+
+HALF_LENGTH_PER_RATIO = 24
+"""
+Half length of the filter in multiples of max(up, down).
+"""
+
+def design_filter(up: int, down: int) -> np.ndarray:
+    """
+    Design the low-pass filter of the polyphase resampler. (Kaiser windowed sinc at the upsampled rate)
+    """
+    max_rate    = max(up, down)
+    half_length = HALF_LENGTH_PER_RATIO * max_rate
+    cutoff      = 1.0 / max_rate
+
+    t = np.arange(-half_length, half_length + 1)
+    h = cutoff * np.sinc(cutoff * t) * np.kaiser(len(t), KAISER_BETA)
+
+    # Gain of `up` to compensate the zero stuffing
+    return h * (up / np.sum(h))
+
+def resample(samples: np.ndarray, source_rate: int, target_rate: int) -> np.ndarray:
+    """
+    Resample the samples in shape (frames, channels) from `source_rate` to `target_rate`.
+
+    The signal is upsampled by `up`, low-pass filtered and downsampled by `down` (`target_rate / source_rate = up / down`).
+    Only the output samples are computed: outputs `n0, n0 + up, n0 + 2 * up, ...` use the same polyphase branch of the filter
+    and input windows at a stride of `down`, so each of them is a product of a strided view of the input and the branch.
+    """
+    if source_rate == target_rate:
+        return samples
+
+    ratio_gcd = math.gcd(source_rate, target_rate)
+    up        = target_rate // ratio_gcd
+    down      = source_rate // ratio_gcd
+
+    h           = design_filter(up, down)
+    half_length = (len(h) - 1) // 2
+
+    # Polyphase branches: branch p has h[p], h[p + up], h[p + 2 * up], ... (reversed to multiply forward windows)
+    taps     = -(-len(h) // up)
+    h_padded = np.zeros(taps * up)
+    h_padded[:len(h)] = h
+    branches = h_padded.reshape(taps, up).T[:, ::-1]
+
+    frames, channels = samples.shape
+    out_frames       = -(-frames * up // down)
+
+    # Input is padded with zeros on both sides for the taps out of range
+    padded = np.zeros((channels, frames + 2 * taps))
+    padded[:, taps:taps + frames] = samples.T
+
+    result = np.empty((out_frames, channels))
+
+    for n0 in range(min(up, out_frames)):
+        # Position in the upsampled signal (centered on the filter)
+        position = n0 * down + half_length
+        phase    = position % up
+        count    = len(range(n0, out_frames, up))
+
+        # First window ends at input frame `position // up` (in the padded input)
+        first = position // up + 1
+        stop  = first + (count - 1) * down + 1
+
+        for c in range(channels):
+            windows = sliding_window_view(padded[c], taps)[first:stop:down]
+            result[n0::up, c] = windows @ branches[phase]
+
+    return result
+
+def convert_channels(samples: np.ndarray, channels: int) -> np.ndarray:
+    """
+    Convert the number of channels of the samples in shape (frames, channels).
+
+    - Down-mix: Output channel `c` is the average of the source channels `s` where `s % channels == c`. (e.g. Stereo to mono)
+    - Up-mix: Output channel `c` is a copy of the source channel `c % source channels`. (e.g. Mono to stereo)
+    """
+    source_channels = samples.shape[1]
+
+    if source_channels == channels:
+        return samples
+
+    if channels < source_channels:
+        result = np.zeros((samples.shape[0], channels))
+        for c in range(channels):
+            result[:, c] = np.mean(samples[:, c::channels], axis=1)
+        return result
+
+    return samples[:, np.arange(channels) % source_channels]
@@ -0,0 +1,202 @@
+"""
+Silence detection on AudioData. (NumPy port of pydub.silence)
+
+RMS is computed in floating point. pydub computes an integer RMS, so ranges match pydub.silence to within about 1-2 ms,
+not exactly.
+"""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from midisampling.waveprocess.audiodata import AudioData, dB_to_ratio
+
+SCAN_FIRST_BLOCK_MS = 256
+"""
+Number of windows tested in the first block of the inward scan. (Doubled for each next block)
+"""
+
+SCAN_MAX_BLOCK_MS = 4096
+"""
+Maximum number of windows tested in a block of the inward scan. (Bounds the memory for streamed audio)
+"""
+
+def _window_rms(audio: AudioData, window_starts: np.ndarray, min_silence_len: int) -> np.ndarray:
+    """
+    RMS (over all channels) of the windows of `min_silence_len` ms starting at `window_starts` ms (ascending).
+    Only the frames covered by the windows are read.
+    """
+    begin = np.minimum((window_starts * audio.sample_rate) // 1000, audio.frames)
+    end   = np.minimum(((window_starts + min_silence_len) * audio.sample_rate) // 1000, audio.frames)
+
+    # Cumulative sum of squares over the covered frames
+    offset     = begin[0]
+    power      = np.sum(np.square(audio.get_frames(offset, end[-1])), axis=1)
+    cumulative = np.concatenate(([0.0], np.cumsum(power)))
+
+    count = np.maximum(end - begin, 1) * audio.channels
+    return np.sqrt(np.maximum(cumulative[end - offset] - cumulative[begin - offset], 0.0) / count)
+
+def detect_silence(audio: AudioData, min_silence_len: int = 1000, silence_thresh: float = -16.0) -> List[Tuple[int, int]]:
+    """
+    Detect silent ranges in milliseconds.
+    A window of `min_silence_len` ms is silent if its RMS (over all channels) is `silence_thresh` dBFS or lower.
+    Windows are tested at every 1 ms.
+
+    Returns
+    -------
+        List[Tuple[int, int]]: List of (start, end) in milliseconds
+    """
+    seg_len = len(audio)
+
+    if seg_len < min_silence_len or min_silence_len <= 0:
+        return []
+
+    threshold = dB_to_ratio(silence_thresh)
+
+    window_starts  = np.arange(0, seg_len - min_silence_len + 1)
+    rms            = _window_rms(audio, window_starts, min_silence_len)
+    silence_starts = window_starts[rms <= threshold]
+
+    if len(silence_starts) == 0:
+        return []
+
+    # Merge overlapping windows into ranges
+    breaks       = np.nonzero(np.diff(silence_starts) > min_silence_len)[0]
+    range_starts = np.concatenate(([silence_starts[0]], silence_starts[breaks + 1]))
+    range_ends   = np.concatenate((silence_starts[breaks], [silence_starts[-1]])) + min_silence_len
+
+    return [(int(s), int(e)) for s, e in zip(range_starts, range_ends)]
+
+def detect_nonsilent(audio: AudioData, min_silence_len: int = 1000, silence_thresh: float = -16.0) -> List[Tuple[int, int]]:
+    """
+    Detect non-silent ranges in milliseconds. (Inverse of `detect_silence()`)
+
+    Returns
+    -------
+        List[Tuple[int, int]]: List of (start, end) in milliseconds
+    """
+    seg_len       = len(audio)
+    silent_ranges = detect_silence(audio, min_silence_len, silence_thresh)
+
+    if len(silent_ranges) == 0:
+        return [(0, seg_len)]
+
+    # The whole audio is silent
+    if silent_ranges[0][0] == 0 and silent_ranges[0][1] == seg_len:
+        return []
+
+    result: List[Tuple[int, int]] = []
+    prev_end = 0
+    for start, end in silent_ranges:
+        result.append((prev_end, start))
+        prev_end = end
+
+    if prev_end != seg_len:
+        result.append((prev_end, seg_len))
+
+    if result[0] == (0, 0):
+        result.pop(0)
+
+    return result
+
+def detect_nonsilent_bounds(audio: AudioData, min_silence_len: int = 1000, silence_thresh: float = -16.0) -> Optional[Tuple[int, int]]:
+    """
+    Get the start of the first and the end of the last non-silent range in milliseconds.
+    Same result as the first start and the last end of `detect_nonsilent()`, but windows are scanned inward from both ends
+    and the scan stops at the first non-silent part. (Cost is proportional to the length of the silent head and tail)
+
+    Returns
+    -------
+        Tuple[int, int]: (start, end) in milliseconds. None if the whole audio is silent.
+    """
+    seg_len = len(audio)
+
+    if seg_len < min_silence_len or min_silence_len <= 0:
+        return (0, seg_len)
+
+    threshold  = dB_to_ratio(silence_thresh)
+    last_start = seg_len - min_silence_len
+
+    #---------------------------------------------------------------------------
+    # Head: Silent windows closer than min_silence_len to each other are merged into one silent range
+    #---------------------------------------------------------------------------
+    last_silent = None  # Last window start of the silent range at the head
+    block_begin = 0
+    block_size  = SCAN_FIRST_BLOCK_MS
+
+    while block_begin <= last_start:
+        window_starts  = np.arange(block_begin, min(block_begin + block_size, last_start + 1))
+        silent         = _window_rms(audio, window_starts, min_silence_len) <= threshold
+        silence_starts = window_starts[silent]
+
+        if last_silent is None:
+            if not silent[0]:
+                # Not silent at the beginning
+                break
+            last_silent = int(silence_starts[0])
+
+        # Silent range ends at the first gap wider than min_silence_len
+        gaps = np.diff(np.concatenate(([last_silent], silence_starts)))
+        wide = np.nonzero(gaps > min_silence_len)[0]
+        if len(wide) > 0:
+            if wide[0] > 0:
+                last_silent = int(silence_starts[wide[0] - 1])
+            break
+
+        if len(silence_starts) > 0:
+            last_silent = int(silence_starts[-1])
+
+        block_end = int(window_starts[-1])
+        if block_end - last_silent > min_silence_len:
+            break
+
+        block_begin += block_size
+        block_size   = min(block_size * 2, SCAN_MAX_BLOCK_MS)
+
+    if last_silent is None:
+        head = 0
+    elif last_silent == last_start:
+        # One silent range from the beginning to the end
+        return None
+    else:
+        head = last_silent + min_silence_len
+
+    #---------------------------------------------------------------------------
+    # Tail
+    #---------------------------------------------------------------------------
+    first_silent = None  # First window start of the silent range at the tail
+    block_end    = last_start + 1
+    block_size   = SCAN_FIRST_BLOCK_MS
+
+    while block_end > 0:
+        window_starts  = np.arange(max(block_end - block_size, 0), block_end)
+        silent         = _window_rms(audio, window_starts, min_silence_len) <= threshold
+        silence_starts = window_starts[silent][::-1]
+
+        if first_silent is None:
+            if not silent[-1]:
+                # Not silent at the end
+                break
+            first_silent = int(silence_starts[0])
+
+        gaps = np.diff(np.concatenate(([first_silent], silence_starts))) * -1
+        wide = np.nonzero(gaps > min_silence_len)[0]
+        if len(wide) > 0:
+            if wide[0] > 0:
+                first_silent = int(silence_starts[wide[0] - 1])
+            break
+
+        if len(silence_starts) > 0:
+            first_silent = int(silence_starts[-1])
+
+        block_begin = int(window_starts[0])
+        if first_silent - block_begin > min_silence_len:
+            break
+
+        block_end  -= block_size
+        block_size  = min(block_size * 2, SCAN_MAX_BLOCK_MS)
+
+    tail = seg_len if first_silent is None else first_silent
+
+    return (head, tail)
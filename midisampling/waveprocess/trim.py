@@ -1,17 +1,14 @@
-from typing import List
+from typing import List, override
 
-import os
-import pathlib
-import shutil
 from logging import getLogger
 
-from pydub import AudioSegment
-from pydub.silence import detect_nonsilent
-
 from midisampling.exportpath import RecordedAudioPath, ProcessedAudioPath
 from midisampling.appconfig.audioprocess import AudioProcessConfig
 
-import midisampling.waveprocess.pydubutil as pydubutil
+from midisampling.waveprocess.audiodata import AudioData
+from midisampling.waveprocess.silence import detect_nonsilent_bounds
+from midisampling.waveprocess.effect import IAudioEffect
+from midisampling.waveprocess.effectchain import AudioEffectChain
 
 logger = getLogger(__name__)
 
@@ -26,16 +23,41 @@ PARAM_KEY_MIN_SILENCE_MS = "min_silence_ms"
 Effect parameter key for min_silence_ms.
 """
 
-def __get_threshold_dBFS(effect_parameters: dict) -> float:
+def _get_threshold_dBFS(effect_parameters: dict) -> float:
     if PARAM_KEY_THRESHOLD_DBFS in effect_parameters:
         return float(effect_parameters[PARAM_KEY_THRESHOLD_DBFS])
     return -50.0
 
-def __get_min_silence_ms(effect_parameters: dict) -> int:
+def _get_min_silence_ms(effect_parameters: dict) -> int:
     if PARAM_KEY_MIN_SILENCE_MS in effect_parameters:
         return int(effect_parameters[PARAM_KEY_MIN_SILENCE_MS])
     return 250
 
+class TrimEffect(IAudioEffect):
+    """
+    Trim silent segments at the beginning and the end of the audio.
+    """
+    def __init__(self, effect_parameters: dict) -> None:
+        super().__init__("trim", effect_parameters)
+        self.threshold_dBFS: float = _get_threshold_dBFS(effect_parameters)
+        self.min_silence_ms: int   = _get_min_silence_ms(effect_parameters)
+
+    @override
+    def supports_streaming(self) -> bool:
+        # Bounds are found by block-wise scans from each end
+        return True
+
+    @override
+    def apply(self, audio: AudioData) -> AudioData:
+        # Scanned inward from both ends. (Silence in the middle is not measured)
+        bounds = detect_nonsilent_bounds(audio, min_silence_len=self.min_silence_ms, silence_thresh=self.threshold_dBFS)
+
+        if bounds:
+            start, end = bounds
+            return audio.slice_ms(start, end)
+
+        return audio
+
 def trim(config: AudioProcessConfig, input_path:str, output_path: str, effect_parameters: dict):
     """
     Trim silent segments from the audio file.
@@ -54,24 +76,13 @@ def trim(config: AudioProcessConfig, input_path:str, output_path: str, effect_pa
         - min_silence_ms : int (default=250)
     """
 
-    threshold_dBFS = __get_threshold_dBFS(effect_parameters)
-    min_silence_ms = __get_min_silence_ms(effect_parameters)
-
-    export_parameters = []
-    pydubutil.to_export_parameters_from_config(config, export_parameters)
-    if len(export_parameters) == 0:
-        export_parameters = None
-
-    audio = AudioSegment.from_wav(input_path)
-    nonsilent_ranges = detect_nonsilent(audio, min_silence_len=min_silence_ms, silence_thresh=threshold_dBFS)
-
-    if nonsilent_ranges:
-        start, end = nonsilent_ranges[0][0], nonsilent_ranges[-1][1]
-        trimmed_audio = audio[start:end]
-        trimmed_audio.export(output_path, format="wav", parameters=export_parameters)
-    else:
-        if input_path != output_path:
-            shutil.copy(input_path, output_path)
+    chain = AudioEffectChain.from_config(config, [TrimEffect(effect_parameters)])
+    chain.process_file(
+        input_path=input_path,
+        output_path=output_path,
+        bit_depth=AudioEffectChain.bit_depth(config),
+        dither=AudioEffectChain.dither(config)
+    )
 
 
 def trim_from_list(config: AudioProcessConfig, file_list: List[ProcessedAudioPath], effect_parameters: dict):
@@ -94,17 +105,8 @@ def trim_from_list(config: AudioProcessConfig, file_list: List[ProcessedAudioPat
     if len(file_list) == 0:
         raise ValueError("file_list is empty")
 
-    for file in file_list:
-        input_path  = file.working_path()
-        output_path = file.working_path()
-        file.makeworkingdirs()
-        trim(
-            config=config,
-            input_path=input_path,
-            output_path=output_path,
-            effect_parameters=effect_parameters
-        )
-        logger.info(f"Trimmed: {file.file_path}")
+    chain = AudioEffectChain.from_config(config, [TrimEffect(effect_parameters)])
+    chain.process(config=config, file_list=file_list, jobs=config.jobs)
 
 def trim_from_directory(config: AudioProcessConfig, input_directory: str, output_directory: str, effect_parameters: dict, overwrite: bool = False):
     """
@@ -1,33 +1,109 @@
-from typing import List
+from typing import Dict, List
 
 import io
 import struct
 
 from logging import getLogger
 
+from midisampling.rf64 import RIFF_MAX_SIZE, RIFF_FORM_IDS
+
 logger = getLogger(__name__)
 
+class ChunkInfo:
+    """
+    Location of a chunk in the file. (Chunk data is not loaded)
+    """
+    def __init__(self, chunk_name: str, data_offset: int, chunk_size: int):
+        self.chunk_name: str  = chunk_name
+        self.data_offset: int = data_offset
+        self.chunk_size: int  = chunk_size
+
+    @classmethod
+    def parse_ds64(cls, ds64_chunk: bytes) -> Dict[str, int]:
+        """
+        Get the 64-bit chunk sizes in the `ds64` chunk of RF64 / BW64.
+
+        ```
+        | riff size (8 byte) | data size (8 byte) | sample count (8 byte) | table length (4 byte) | table: (chunk name (4 byte) | chunk size (8 byte)) ...
+        ```
+        """
+        _, data_size, _, table_length = struct.unpack('<QQQI', ds64_chunk[0:28])
+
+        result: Dict[str, int] = {"data": data_size}
+        for i in range(table_length):
+            entry_offset = 28 + i * 12
+            entry        = ds64_chunk[entry_offset:entry_offset + 12]
+            if len(entry) < 12:
+                break
+            result[entry[0:4].decode('ascii')] = struct.unpack('<Q', entry[4:12])[0]
+
+        return result
+
+    @classmethod
+    def from_file(cls, f: io.BufferedReader) -> List['ChunkInfo']:
+        """
+        Walk the chunk headers of the RIFF/WAVE file by seeking. (RIFF chunk itself is not included)
+        For RF64 / BW64, chunk sizes over 4 GB are resolved from the `ds64` chunk.
+        """
+        f.seek(0)
+        riff_header = f.read(12)
+        if len(riff_header) < 12 or riff_header[0:4] not in RIFF_FORM_IDS or riff_header[8:12] != b"WAVE":
+            raise ValueError("Not a RIFF/WAVE file")
+
+        is_rf64: bool               = riff_header[0:4] != b"RIFF"
+        large_sizes: Dict[str, int] = {}
+        result: List['ChunkInfo']   = []
+
+        while True:
+            header = f.read(ChunkData.SIZEOF_CHUNK_NAME_AND_CHUNK_SIZE)
+            if len(header) < ChunkData.SIZEOF_CHUNK_NAME_AND_CHUNK_SIZE:
+                break
+
+            chunk_name  = header[0:4].decode('ascii')
+            chunk_size  = struct.unpack('<I', header[4:8])[0]
+            data_offset = f.tell()
+
+            if is_rf64:
+                if chunk_name == "ds64" and len(result) == 0:
+                    large_sizes = ChunkInfo.parse_ds64(f.read(chunk_size))
+                elif chunk_size == RIFF_MAX_SIZE and chunk_name in large_sizes:
+                    chunk_size = large_sizes[chunk_name]
+
+            result.append(ChunkInfo(chunk_name, data_offset, chunk_size))
+
+            # Skip chunk data and padding byte
+            f.seek(data_offset + chunk_size + (chunk_size % 2))
+
+        return result
+
+    @classmethod
+    def from_path(cls, file_path: str) -> List['ChunkInfo']:
+        with open(file_path, 'rb') as f:
+            return ChunkInfo.from_file(f)
+
+    def __str__(self) -> str:
+        return f"chunk_name={self.chunk_name}, data_offset={self.data_offset}/0x{self.data_offset:x}, chunk_size={self.chunk_size}/0x{self.chunk_size:x}"
+
 class ChunkData:
-    def __init__(self, chunk_name: str, chunk_data: bytes, chunk_size):
+    def __init__(self, chunk_name: str, chunk_data: bytes):
         self.chunk_name: str    = chunk_name
         self.chunk_data: bytes  = chunk_data
-        self.chunk_size: int    = chunk_size
+        self.chunk_size: int    = len(chunk_data)
         self.padding_count: int = 0 if len(chunk_data) % 2 == 0 else 1
 
     def write(self, f: io.BufferedWriter):
         """
         Write chunk data to given file object
         """
+        if self.chunk_size > RIFF_MAX_SIZE:
+            raise ValueError(f"Chunk is too large to write: {self}")
+
         start = f.tell()
 
-        if self.chunk_name == "RIFF":
-            f.write(self.chunk_name.encode('ascii'))
-            f.write(self.chunk_size.to_bytes(4, byteorder='little'))
-            f.write("WAVE".encode('ascii'))
-        else:
-            f.write(self.chunk_name.encode('ascii'))
-            f.write((len(self.chunk_data)).to_bytes(4, byteorder='little'))
-            f.write(self.chunk_data)
+        f.write(self.chunk_name.encode('ascii'))
+        f.write(self.chunk_size.to_bytes(4, byteorder='little'))
+        f.write(self.chunk_data)
+        f.write(b"\x00" * self.padding_count)
 
         written_size = f.tell() - start
         logger.debug(f"written: {self} - size={written_size}/0x{written_size:x} bytes")
@@ -38,110 +114,37 @@ class ChunkData:
     """
 
     @classmethod
-    def from_bytes(cls, file_bytes: bytes) -> List['ChunkData']:
-        result: List['ChunkData'] = []
-        length = len(file_bytes)
-        current_index = 0
-
-        while current_index < length:
-
-            # Chunk format
+    def from_file(cls, f: io.BufferedReader, skip_chunk_names: List[str] = ["data", "ds64"]) -> List['ChunkData']:
+        """
+        Read the chunks of the RIFF/WAVE file by seeking. (RIFF chunk itself is not included)
+        Chunks in `skip_chunk_names` (audio samples and RF64 sizes by default) are not loaded and not included.
+        """
 
-            # | 'xxxx' (chunk name: 4 byte)  |  chunk size (4 byte) |    chunk data ...   |
-            # |<<-------SIZEOF_CHUNK_NAME_AND_CHUNK_SIZE --------->>|<<-- chunk_size-- >> |
-            # ^                                                     ^
-            # |                                                     |
-            # current_index                                         chunk_data_start_index
+        # Chunk format
 
-            chunk_name = file_bytes[current_index:current_index + 4].decode('ascii')
-            chunk_size = struct.unpack(
-                '<I',
-                file_bytes[
-                    current_index + 4:
-                    current_index + ChunkData.SIZEOF_CHUNK_NAME_AND_CHUNK_SIZE
-                ]
-            )[0]
+        # | 'xxxx' (chunk name: 4 byte)  |  chunk size (4 byte) |    chunk data ...   | (padding: 1 byte if chunk size is odd)
+        # |<<-------SIZEOF_CHUNK_NAME_AND_CHUNK_SIZE --------->>|<<-- chunk_size-- >> |
+        #                                                       ^
+        #                                                       |
+        #                                                       data_offset
 
-            chunk_data_start_index = current_index + ChunkData.SIZEOF_CHUNK_NAME_AND_CHUNK_SIZE
+        result: List['ChunkData'] = []
 
-            padding_count = 0
-            if chunk_size % 2 != 0:
-                padding_count = 1
+        for info in ChunkInfo.from_file(f):
+            if info.chunk_name in skip_chunk_names:
+                logger.debug(f"skip: {info}")
+                continue
 
-            if chunk_name == "RIFF":
-                chunk_data = "WAVE".encode('ascii')
-            else:
-                chunk_data = file_bytes[
-                    chunk_data_start_index:
-                    chunk_data_start_index + chunk_size + padding_count
-                ]
-
-            chunk_data = ChunkData(
-                chunk_name=chunk_name,
-                chunk_data=chunk_data,
-                chunk_size=chunk_size
-            )
+            f.seek(info.data_offset)
+            chunk_data = ChunkData(chunk_name=info.chunk_name, chunk_data=f.read(info.chunk_size))
             result.append(chunk_data)
 
             logger.debug(f"read: {chunk_data}")
 
-            if chunk_name == "RIFF":
-                # RIFF `chunk size` is `file size - 8` stored
-                #
-                # | 'RIFF' (4byte) | chunk size (4byte) | 'WAVE' (4byte) |
-                #
-                # -> (Next chunk start index is + 12)
-                current_index += 12
-            else:
-                current_index += chunk_size + ChunkData.SIZEOF_CHUNK_NAME_AND_CHUNK_SIZE + padding_count
-
-        return result
-
-    @classmethod
-    def calc_riff_chunk_size(cls, chunks: List['ChunkData']) -> int:
-        """
-        Calculate RIFF chunk size from given chunks
-        """
-        result = 0
-        for x in chunks:
-            if x.chunk_name == "RIFF":
-                result += 4 # sizeof 'WAVE' in chunk_data
-            else:
-                logger.debug(f"calc: {x}")
-                result += (
-                    ChunkData.SIZEOF_CHUNK_NAME_AND_CHUNK_SIZE
-                    + len(x.chunk_data)
-                    + x.padding_count
-                )
-
         return result
 
-    @classmethod
-    def update_riff_chunk_size(cls, chunks: List['ChunkData']) -> bool:
-        """
-        Update RIFF chunk size in given chunks
-
-        Parameters
-        ----------
-        chunks : List['ChunkData']
-            List of chunks
-
-        Returns
-        -------
-        bool
-            If RIFF chunk is found and updated, return True. Otherwise, return False.
-        """
-        logger.debug(f"update_riff_chunk_size")
-        new_size = ChunkData.calc_riff_chunk_size(chunks)
-        for x in chunks:
-            if x.chunk_name == "RIFF":
-                x.chunk_size = new_size
-                return True
-
-        return False
-
     def __str__(self) -> str:
-        return f"chunk_name={self.chunk_name}, chunk_size={self.chunk_size}/0x{self.chunk_size:x}, data={len(self.chunk_data)}, padding_count={self.padding_count}"
+        return f"chunk_name={self.chunk_name}, chunk_size={self.chunk_size}/0x{self.chunk_size:x}, padding_count={self.padding_count}"
 
 
 class WavChunkKeeper:
@@ -152,6 +155,8 @@ class WavChunkKeeper:
 
     As a typical example, we assume chunks unique to waveform editing software or music production software.
 
+    Only the chunk headers and the non-`data` chunks are read. Audio samples are never loaded or rewritten.
+
     Examples
     --------
 
@@ -187,9 +192,8 @@ class WavChunkKeeper:
         self.target_path: str = target_path
         self.source_file_chunk_list: List[ChunkData] = []
 
-        with(open(self.source_path, 'rb')) as f:
-            source_file_bytes = f.read()
-            self.source_file_chunk_list = ChunkData.from_bytes(source_file_bytes)
+        with open(self.source_path, 'rb') as f:
+            self.source_file_chunk_list = ChunkData.from_file(f)
 
         if len(keep_chunk_names) > 0:
             logger.debug(f"Request to keep only specified chunks: {keep_chunk_names}")
@@ -199,40 +203,49 @@ class WavChunkKeeper:
 
     def restore(self):
         """
-        Restore the chunks to target_path
+        Restore the chunks to target_path.
+        Missing chunks are appended at the end of the file and the RIFF chunk size is patched in place.
+        (The 64-bit size in the `ds64` chunk for RF64 / BW64)
         """
 
-        with open(self.target_path, 'rb') as f:
-            file_bytes = f.read()
-
-        file_chunk_list        = ChunkData.from_bytes(file_bytes)
-        appenging_chunk_list   = []
-
-        for source_chunk in self.source_file_chunk_list:
-            found = False
-            for file_chunk in file_chunk_list:
-                if source_chunk.chunk_name == file_chunk.chunk_name:
-                    found = True
-                    break
-            if not found:
-                appenging_chunk_list.append(source_chunk)
-
-        logger.info(f"write to {self.target_path}")
-        with open(self.target_path, 'wb') as f:
-
-            write_chunk_list = file_chunk_list + appenging_chunk_list
-            ChunkData.update_riff_chunk_size(write_chunk_list)
-
-            for x in write_chunk_list:
+        with open(self.target_path, 'r+b') as f:
+            form_id              = f.read(4)
+            file_chunk_list      = ChunkInfo.from_file(f)
+            file_chunk_names     = set([x.chunk_name for x in file_chunk_list])
+            appenging_chunk_list = [x for x in self.source_file_chunk_list if x.chunk_name not in file_chunk_names]
+
+            if len(appenging_chunk_list) == 0:
+                logger.debug(f"No chunks to restore: {self.target_path}")
+                return
+
+            # Append after the last chunk (including its padding byte)
+            end_offset = 12
+            if len(file_chunk_list) > 0:
+                last       = file_chunk_list[-1]
+                end_offset = last.data_offset + last.chunk_size + (last.chunk_size % 2)
+
+            logger.debug(f"append to {self.target_path} at 0x{end_offset:x}")
+            f.seek(end_offset)
+            for x in appenging_chunk_list:
                 x.write(f)
+            f.truncate()
 
-            logger.debug(f"Validate RIFF chunk size")
-            expected_riff_size = f.tell() - 8
-            actual_riff_size   = ChunkData.calc_riff_chunk_size(write_chunk_list)
-            logger.debug(f"expected_riff_size: 0x{expected_riff_size:x}")
-            logger.debug(f"actual_riff_size: 0x{actual_riff_size:x}")
-
-            if expected_riff_size != actual_riff_size:
-                raise ValueError("RIFF chunk size is not matched")
+            # RIFF `chunk size` is `file size - 8`
+            riff_size = f.tell() - 8
 
+            if form_id == b"RIFF":
+                if riff_size > RIFF_MAX_SIZE:
+                    raise ValueError(f"RIFF size exceeds 4 GB by restoring chunks: {self.target_path}")
+                f.seek(4)
+                f.write(riff_size.to_bytes(4, byteorder='little'))
+            else:
+                ds64_chunk = file_chunk_list[0]
+                if ds64_chunk.chunk_name != "ds64":
+                    raise ValueError(f"ds64 chunk is not found: {self.target_path}")
+                f.seek(4)
+                f.write(RIFF_MAX_SIZE.to_bytes(4, byteorder='little'))
+                f.seek(ds64_chunk.data_offset)
+                f.write(riff_size.to_bytes(8, byteorder='little'))
+
+            logger.debug(f"riff_size: 0x{riff_size:x}")
             logger.debug(f"restored: {self.target_path}")
@@ -0,0 +1,174 @@
+"""
+Fast peak / RMS scanner for wav files.
+The `data` chunk is read block by block and reduced without decoding the whole file.
+(Not memory-mapped: Mapped pages of the whole file would stay resident)
+"""
+
+from typing import Optional
+import os
+import struct
+
+from logging import getLogger
+
+import numpy as np
+
+from midisampling.waveprocess.wavchunkkeeper import ChunkInfo
+
+logger = getLogger(__name__)
+
+WAVE_FORMAT_PCM        = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+SCAN_BLOCK_FRAMES = 1024 * 1024
+"""
+Number of frames reduced at once. (Bounds the memory for 24-bit samples)
+"""
+
+class WavFormat:
+    """
+    Sample format in the `fmt ` chunk.
+    """
+    def __init__(self, format_tag: int, channels: int, sample_rate: int, block_align: int, bits_per_sample: int):
+        self.format_tag: int      = format_tag
+        self.channels: int        = channels
+        self.sample_rate: int     = sample_rate
+        self.block_align: int     = block_align
+        self.bits_per_sample: int = bits_per_sample
+
+    @classmethod
+    def from_bytes(cls, fmt_chunk: bytes) -> 'WavFormat':
+        format_tag, channels, sample_rate, _, block_align, bits_per_sample = struct.unpack('<HHIIHH', fmt_chunk[0:16])
+
+        if format_tag == WAVE_FORMAT_EXTENSIBLE and len(fmt_chunk) >= 26:
+            # First 2 bytes of SubFormat GUID is the format tag
+            format_tag = struct.unpack('<H', fmt_chunk[24:26])[0]
+
+        return WavFormat(format_tag, channels, sample_rate, block_align, bits_per_sample)
+
+    def numpy_dtype(self) -> Optional[str]:
+        """
+        Get numpy dtype of a sample. (None if not supported)
+        """
+        if self.format_tag == WAVE_FORMAT_PCM:
+            if self.bits_per_sample == 16:
+                return "<i2"
+            if self.bits_per_sample == 24:
+                return "u1" # Reduced as 3 bytes
+            if self.bits_per_sample == 32:
+                return "<i4"
+        elif self.format_tag == WAVE_FORMAT_IEEE_FLOAT:
+            if self.bits_per_sample == 32:
+                return "<f4"
+            if self.bits_per_sample == 64:
+                return "<f8"
+        return None
+
+    def __str__(self) -> str:
+        return f"format_tag=0x{self.format_tag:04x}, channels={self.channels}, sample_rate={self.sample_rate}, block_align={self.block_align}, bits_per_sample={self.bits_per_sample}"
+
+def _int24_to_int32(block: np.ndarray) -> np.ndarray:
+    """
+    Convert (n, 3) little endian bytes to int32.
+    """
+    value = (
+        block[:, 0].astype(np.int32)
+        | (block[:, 1].astype(np.int32) << 8)
+        | (block[:, 2].astype(np.int8).astype(np.int32) << 16)
+    )
+    return value
+
+class WavStats:
+    """
+    Statistics of the samples in a wav file. (Full scale is 1.0)
+    """
+    def __init__(self, peak: float, rms: float, frames: int):
+        self.peak: float = peak
+        self.rms: float  = rms
+        self.frames: int = frames
+
+    def to_dict(self) -> dict:
+        return {"peak": self.peak, "rms": self.rms, "frames": self.frames}
+
+    @classmethod
+    def from_dict(cls, values: dict) -> 'WavStats':
+        return WavStats(peak=values["peak"], rms=values["rms"], frames=values["frames"])
+
+    def __str__(self) -> str:
+        return f"peak={self.peak}, rms={self.rms}, frames={self.frames}"
+
+def scan_stats(file_path: str) -> Optional[WavStats]:
+    """
+    Get the peak, RMS (over all channels) and the number of frames of the wav file.
+
+    Returns
+    -------
+        WavStats: Statistics. None if the format is not supported by the scanner. (Decode the file instead)
+    """
+    with open(file_path, 'rb') as f:
+        chunks = {x.chunk_name: x for x in ChunkInfo.from_file(f)}
+
+        if "fmt " not in chunks or "data" not in chunks:
+            return None
+
+        fmt_chunk = chunks["fmt "]
+        f.seek(fmt_chunk.data_offset)
+        wav_format = WavFormat.from_bytes(f.read(fmt_chunk.chunk_size))
+
+    dtype = wav_format.numpy_dtype()
+    if dtype is None or wav_format.channels == 0 or wav_format.block_align == 0:
+        logger.debug(f"Peak scanner does not support the format: {wav_format}")
+        return None
+
+    data_chunk = chunks["data"]
+
+    # Clamp to the file size (e.g. Interrupted recording)
+    data_size = min(data_chunk.chunk_size, os.path.getsize(file_path) - data_chunk.data_offset)
+    frames    = data_size // wav_format.block_align
+    samples   = frames * wav_format.channels
+
+    if samples == 0:
+        return WavStats(peak=0.0, rms=0.0, frames=0)
+
+    # Read block by block instead of memmap (Mapped pages of the whole file would stay resident)
+    sample_bytes = 3 if dtype == "u1" else np.dtype(dtype).itemsize
+    block_size   = SCAN_BLOCK_FRAMES * wav_format.channels
+    max_value    = 0
+    min_value    = 0
+    sum_squares  = 0.0
+
+    with open(file_path, "rb") as f:
+        f.seek(data_chunk.data_offset)
+        for begin in range(0, samples, block_size):
+            count = min(block_size, samples - begin)
+            block = np.frombuffer(f.read(count * sample_bytes), dtype=np.uint8 if dtype == "u1" else dtype)
+            if dtype == "u1":
+                block = _int24_to_int32(block.reshape(count, 3))
+            max_value = max(max_value, block.max().item())
+            min_value = min(min_value, block.min().item())
+
+            block_float  = block.astype(np.float64)
+            sum_squares += float(np.dot(block_float, block_float))
+
+    peak = float(max(max_value, -min_value))
+    rms  = float(np.sqrt(sum_squares / samples))
+
+    if wav_format.format_tag == WAVE_FORMAT_PCM:
+        full_scale = 2.0 ** (wav_format.bits_per_sample - 1)
+        peak /= full_scale
+        rms  /= full_scale
+
+    return WavStats(peak=peak, rms=rms, frames=frames)
+
+def scan_peak(file_path: str) -> Optional[float]:
+    """
+    Get the absolute peak (full scale is 1.0) of the wav file.
+
+    Returns
+    -------
+        float: Peak. None if the format is not supported by the scanner. (Decode the file instead)
+    """
+    stats = scan_stats(file_path)
+    if stats is None:
+        return None
+    return stats.peak
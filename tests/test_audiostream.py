@@ -0,0 +1,42 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import soundfile as sf
+
+from midisampling.waveprocess.audiostream import AudioStream, STREAM_BLOCK_FRAMES
+
+SAMPLE_RATE = 48000
+
+class TestAudioStreamDither(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir    = tempfile.TemporaryDirectory()
+        self.input_path  = os.path.join(self.temp_dir.name, "in.wav")
+        self.output_path = os.path.join(self.temp_dir.name, "out.wav")
+
+        # A silent block followed by a tone block
+        tone    = 0.5 * np.sin(np.arange(STREAM_BLOCK_FRAMES) / 7.0)
+        samples = np.concatenate([np.zeros(STREAM_BLOCK_FRAMES), tone])
+        sf.write(self.input_path, samples, SAMPLE_RATE, subtype="PCM_24")
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_dither_whole_file(self):
+        AudioStream.open(self.input_path).apply_gain(-3.0).write(self.output_path, bit_depth="int16", dither=True)
+
+        output, _ = sf.read(self.output_path, dtype="int16")
+        # The silent block is dithered as well as the tone block
+        self.assertTrue(np.any(output[:STREAM_BLOCK_FRAMES] != 0))
+
+    def test_exact_not_dithered(self):
+        AudioStream.open(self.input_path).slice_ms(0, 2000).write(self.output_path, bit_depth="int24", dither=True)
+
+        expected, _ = sf.read(self.input_path, dtype="int32")
+        output, _   = sf.read(self.output_path, dtype="int32")
+        np.testing.assert_array_equal(output, expected[:len(output)])
+
+if __name__ == "__main__":
+    unittest.main()
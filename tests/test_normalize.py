@@ -0,0 +1,78 @@
+import os
+import json
+import tempfile
+import unittest
+from typing import List
+from unittest import mock
+
+import numpy as np
+import soundfile as sf
+
+from midisampling.appconfig.audioprocess import AudioProcessConfig
+from midisampling.exportpath import RecordedAudioPath
+from midisampling.waveprocess.processing import process
+from midisampling.waveprocess.effectchain import AudioEffectChain
+
+SAMPLE_RATE = 48000
+
+def _write_tone(file_path: str, amplitude: float) -> None:
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    samples = amplitude * np.sin(np.arange(SAMPLE_RATE // 10) / 7.0)
+    sf.write(file_path, np.stack([samples, samples], axis=1), SAMPLE_RATE, subtype="PCM_24")
+
+def _peak_dBFS(file_path: str) -> float:
+    samples, _ = sf.read(file_path)
+    return 20.0 * np.log10(np.max(np.abs(samples)))
+
+class TestGroupNormalize(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir   = tempfile.TemporaryDirectory()
+        self.input_dir  = os.path.join(self.temp_dir.name, "in")
+        self.output_dir = os.path.join(self.temp_dir.name, "out")
+
+        config_path = os.path.join(self.temp_dir.name, "process.json")
+        with open(config_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "keep_wav_chunks": [],
+                "effects": [
+                    {"index": 0, "name": "normalize", "params": {"target_dBFS": -1.0, "group_by": {"regex": "^([^/]+)/"}}}
+                ]
+            }, f)
+        self.config = AudioProcessConfig(config_path)
+
+        _write_tone(os.path.join(self.input_dir, "p1", "a.wav"), 0.5)
+        _write_tone(os.path.join(self.input_dir, "p1", "b.wav"), 0.25)
+        _write_tone(os.path.join(self.input_dir, "p2", "a.wav"), 0.1)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _process(self) -> List[str]:
+        """
+        Process the input directory. Returns the input files written in this call (relative paths).
+        """
+        files = RecordedAudioPath.from_directory(self.input_dir)
+
+        with mock.patch.object(AudioEffectChain, "process_file", autospec=True, side_effect=AudioEffectChain.process_file) as process_file:
+            process(config=self.config, recorded_files=files, output_dir=self.output_dir)
+
+        return sorted(os.path.relpath(x.kwargs["input_path"], self.input_dir) for x in process_file.call_args_list)
+
+    def test_gain_per_group(self) -> None:
+        self._process()
+
+        self.assertAlmostEqual(_peak_dBFS(os.path.join(self.output_dir, "p1", "a.wav")), -1.0, places=2)
+        self.assertAlmostEqual(_peak_dBFS(os.path.join(self.output_dir, "p1", "b.wav")), -1.0 - 20.0 * np.log10(2.0), places=2)
+        self.assertAlmostEqual(_peak_dBFS(os.path.join(self.output_dir, "p2", "a.wav")), -1.0, places=2)
+
+    def test_only_changed_group_is_reprocessed(self) -> None:
+        self._process()
+
+        # Gain of p2 changes, gain of p1 does not
+        _write_tone(os.path.join(self.input_dir, "p2", "a.wav"), 0.2)
+
+        self.assertEqual(self._process(), [os.path.join("p2", "a.wav")])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import os
+import json
+import tempfile
+import unittest
+from typing import List
+from unittest import mock
+
+try:
+    from midisampling.sampling import ShardedSampling
+except OSError as e:
+    # sounddevice raises OSError if PortAudio is not installed
+    raise unittest.SkipTest(f"sounddevice is not available: {e}")
+
+from midisampling.appconfig.midi import MidiConfig, ProgramChange, SampleZone, VelocityLayer
+from midisampling.appconfig.sampling import SamplingConfig
+from midisampling.exportpath import RecordedAudioPath
+from midisampling.journal import SamplingJournal, JOURNAL_FILE_NAME
+
+MIDI_CONFIG = {
+    "output_dir": "_recorded",
+    "processed_output_dir": "_processed",
+    "output_prefix_format": "{pc}/{key_root}_{velocity}",
+    "pre_send_smf_path_list": [],
+    "midi_channel": 0,
+    "midi_program_change_list": [
+        {"msb": 0, "lsb": 0, "program": 1},
+        {"msb": 0, "lsb": 0, "program": 2}
+    ],
+    "sample_zone": [
+        {
+            "keys": {"from": 60, "to": 62},
+            "velocity_layers": [
+                {"min": 0, "max": 63, "send": 63},
+                {"min": 64, "max": 127, "send": 127}
+            ]
+        }
+    ],
+    "midi_pre_wait_duration": 0.0,
+    "midi_note_duration": 0.1,
+    "midi_release_duration": 0.1
+}
+
+SAMPLING_CONFIG = {
+    "audio_channels": 2,
+    "audio_sample_rate": 48000,
+    "audio_sample_bits": 24,
+    "audio_sample_bits_format": "int",
+    "rigs": [
+        {"audio_in_device": {"name": "Rig A", "platform": "ASIO"}, "midi_out_device": "A"},
+        {"audio_in_device": {"name": "Rig B", "platform": "ASIO"}, "midi_out_device": "B"}
+    ]
+}
+
+class _FakeWorker:
+    """
+    Stands in for the DefaultSampling worker of a rig. (No MIDI or audio device)
+    """
+    def __init__(self) -> None:
+        self.journal: SamplingJournal = None
+        self.sampled: List[tuple]     = []
+
+    def pre_send_smf(self) -> None:
+        pass
+
+    def send_progam_change(self, channel: int, program: ProgramChange) -> None:
+        pass
+
+    def post_sampling(self) -> None:
+        pass
+
+    def sample(self, program: ProgramChange, zone: SampleZone, velocity: VelocityLayer, recorded_path_list: List[RecordedAudioPath]) -> None:
+        self.sampled.append((program, zone, velocity))
+
+def _write_json(path: str, data: dict) -> str:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    return path
+
+class TestShardedSampling(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+        self.midi_config     = MidiConfig(_write_json(os.path.join(self.temp_dir.name, "midi.json"), MIDI_CONFIG))
+        self.sampling_config = SamplingConfig(_write_json(os.path.join(self.temp_dir.name, "sampling.json"), SAMPLING_CONFIG))
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _create_sampling(self, resume: bool) -> ShardedSampling:
+        sampling         = ShardedSampling(self.sampling_config, self.midi_config, None, resume=resume)
+        sampling.workers = [_FakeWorker() for _ in self.sampling_config.rigs]
+        return sampling
+
+    def _complete_all_items(self, sampling: ShardedSampling) -> List[RecordedAudioPath]:
+        """
+        Write all recorded files and the journal as a finished session.
+        """
+        os.makedirs(self.midi_config.output_dir, exist_ok=True)
+        journal = SamplingJournal(os.path.join(self.midi_config.output_dir, JOURNAL_FILE_NAME))
+        journal.clear()
+
+        recorded_paths: List[RecordedAudioPath] = []
+        for program in self.midi_config.program_change_list:
+            for zone in self.midi_config.sample_zone:
+                for velocity in zone.velocity_layers:
+                    path = sampling.get_recorded_path(program, zone, velocity)
+                    path.makedirs()
+                    with open(path.path(), "wb") as f:
+                        f.write(b"RIFF")
+                    journal.append(program, zone, velocity, path)
+                    recorded_paths.append(path)
+
+        return recorded_paths
+
+    def test_resume_completed_session(self) -> None:
+        sampling       = self._create_sampling(resume=True)
+        recorded_paths = self._complete_all_items(sampling)
+
+        with mock.patch.object(sampling, "post_process") as post_process:
+            sampling.execute()
+
+        # Nothing is sampled, all files are post processed
+        for worker in sampling.workers:
+            self.assertEqual(worker.sampled, [])
+
+        post_process.assert_called_once()
+        self.assertEqual(post_process.call_args.args[1], recorded_paths)
+
+    def test_sample_not_supported(self) -> None:
+        sampling = self._create_sampling(resume=False)
+        program  = self.midi_config.program_change_list[0]
+        zone     = self.midi_config.sample_zone[0]
+
+        # Not recorded on any rig silently
+        with self.assertRaises(NotImplementedError):
+            sampling.sample(program, zone, zone.velocity_layers[0], [])
+
+        for worker in sampling.workers:
+            self.assertEqual(worker.sampled, [])
+
+if __name__ == "__main__":
+    unittest.main()
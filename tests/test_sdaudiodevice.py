@@ -0,0 +1,120 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import numpy as np
+
+try:
+    import midisampling.device.SdAudioDevice as sd_audio_device
+except OSError as e:
+    # sounddevice raises OSError if PortAudio is not installed
+    raise unittest.SkipTest(f"sounddevice is not available: {e}")
+
+from midisampling.device.audiodevice import AudioDeviceOption, AudioDataFormat
+from midisampling.device.audioexport import AudioExportQueue
+
+SAMPLE_RATE = 48000
+CHANNELS    = 2
+BLOCK_SIZE  = 256
+
+class _FakeStream:
+    """
+    Stands in for sd.InputStream. Blocks are delivered by calling `SdAudioDevice._on_audio_input()` from the test.
+    """
+    def stop(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+def _create_device() -> sd_audio_device.SdAudioDevice:
+    option = AudioDeviceOption(
+        device_name="fake",
+        device_platform="fake",
+        sample_rate=SAMPLE_RATE,
+        channels=CHANNELS,
+        data_format=AudioDataFormat.INT16,
+        input_ports=[]
+    )
+
+    with mock.patch.object(sd_audio_device.sd, "query_devices", return_value=[]):
+        device = sd_audio_device.SdAudioDevice(option)
+
+    # Same state as initialize() without opening a real input stream
+    device.dtype        = sd_audio_device.CAPTURE_DTYPE_TABLE[option.data_format]
+    device.stream       = _FakeStream()
+    device.export_queue = AudioExportQueue(max_pending=sd_audio_device.EXPORT_QUEUE_SIZE)
+    return device
+
+def _deliver(device: sd_audio_device.SdAudioDevice, frames: int = BLOCK_SIZE) -> None:
+    block = np.ones((frames, CHANNELS), dtype=device.dtype)
+    device._on_audio_input(block, frames, None, sd_audio_device.sd.CallbackFlags())
+
+def _run_with_timeout(target, timeout: float) -> bool:
+    """
+    Run `target` on a thread. Returns False if it did not return within `timeout` seconds.
+    """
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    return not thread.is_alive()
+
+class TestSdAudioDevice(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_dispose_while_streaming_take(self) -> None:
+        device    = _create_device()
+        file_path = os.path.join(self.temp_dir.name, "take.wav")
+
+        device.start_recording_to_file(duration=10.0, file_path=file_path)
+        _deliver(device)
+
+        # Writer job is waiting for the rest of the take
+        self.assertTrue(_run_with_timeout(device.dispose, timeout=5.0), "dispose() did not return")
+        self.assertIsNone(device.take)
+        self.assertIsNone(device.export_queue)
+
+    def test_streaming_take_completed(self) -> None:
+        device    = _create_device()
+        file_path = os.path.join(self.temp_dir.name, "take.wav")
+        exported  = []
+
+        device.start_recording_to_file(duration=BLOCK_SIZE * 4 / SAMPLE_RATE, file_path=file_path, on_exported=lambda: exported.append(file_path))
+        for _ in range(4):
+            _deliver(device)
+        device.stop_recording()
+        device.wait_for_export()
+        device.dispose()
+
+        self.assertEqual(exported, [file_path])
+        self.assertEqual(os.listdir(self.temp_dir.name), ["take.wav"])
+
+    def test_streaming_take_timeout_is_discarded(self) -> None:
+        device    = _create_device()
+        file_path = os.path.join(self.temp_dir.name, "take.wav")
+        exported  = []
+
+        device.start_recording_to_file(duration=BLOCK_SIZE * 4 / SAMPLE_RATE, file_path=file_path, on_exported=lambda: exported.append(file_path))
+        _deliver(device)
+
+        # Input stream stops delivering before the end of the take
+        with mock.patch.object(sd_audio_device, "STOP_RECORDING_TIMEOUT_MARGIN", 0.1):
+            with self.assertRaises(TimeoutError):
+                device.stop_recording()
+
+        device.wait_for_export()
+        device.dispose()
+
+        # Truncated take is neither reported as exported nor left on disk
+        self.assertEqual(exported, [])
+        self.assertEqual(os.listdir(self.temp_dir.name), [])
+
+if __name__ == "__main__":
+    unittest.main()